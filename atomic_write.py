@@ -0,0 +1,110 @@
+from contextlib import contextmanager
+from pathlib import Path
+import io
+import os
+import threading
+
+from fa_arg_parse import d_print
+
+_lock = threading.Lock()
+# saves waiting for the outermost coalesce block to end
+_pending: dict[Path, bytes] = {}
+_depth = 0
+
+
+class WriteStats(object):
+    def __init__(self) -> None:
+        self.saves = 0
+        self.files_written = 0
+        self.bytes_written = 0
+
+    def summary(self) -> str:
+        return (
+            f"{self.saves} saves, {self.files_written} files written, "
+            f"{self.bytes_written} bytes"
+        )
+
+
+stats = WriteStats()
+
+
+def _encode(data: bytes | str, encoding: str, newline: str | None) -> bytes:
+    if isinstance(data, bytes):
+        return data
+    if newline is None:
+        newline = os.linesep
+    if newline:
+        data = data.replace("\n", newline)
+    return data.encode(encoding)
+
+
+def replace_file(path: Path, data: bytes | str, encoding="utf8", newline=None):
+    """Write the whole file now, so it's either the old or the new version even after a crash.
+    newline works like open's, translating \\n to os.linesep when left as None."""
+    data = _encode(data, encoding, newline)
+    with _lock:
+        _pending.pop(path, None)
+    # unique to this thread of this process, so two writers never share one
+    tmp = path.with_name(f"{path.name}.{os.getpid()}-{threading.get_ident()}.tmp")
+    try:
+        with open(tmp, "wb") as fp:
+            fp.write(data)
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    stats.files_written += 1
+    stats.bytes_written += len(data)
+
+
+def save(path: Path, data: bytes | str, encoding="utf8", newline=None):
+    """Like replace_file, but inside a coalesce block it's only written when the block ends,
+    with the last data saved for that path."""
+    stats.saves += 1
+    data = _encode(data, encoding, newline)
+    with _lock:
+        if _depth:
+            _pending[path] = data
+            return
+    replace_file(path, data)
+
+
+def open_saved(path: Path, encoding="utf8", newline=None):
+    """Open path for reading, seeing a save that's still waiting to be written."""
+    with _lock:
+        data = _pending.get(path)
+    if data is None:
+        return open(path, encoding=encoding, newline=newline)
+    return io.TextIOWrapper(io.BytesIO(data), encoding=encoding, newline=newline)
+
+
+def flush():
+    """Write every waiting save now."""
+    with _lock:
+        pending = list(_pending.items())
+        _pending.clear()
+    for path, data in pending:
+        try:
+            replace_file(path, data)
+        except OSError as e:
+            print(f"Unable to save {path}: {e}")
+    if pending:
+        d_print("Saved files:", stats.summary())
+
+
+@contextmanager
+def coalesce():
+    """Hold back saves until the outermost block ends, so a file saved many times is written once."""
+    global _depth
+    with _lock:
+        _depth += 1
+    try:
+        yield
+    finally:
+        with _lock:
+            _depth -= 1
+            done = _depth == 0
+        if done:
+            flush()
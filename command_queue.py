@@ -0,0 +1,111 @@
+from collections import deque
+from typing import Any, Callable, Hashable
+import threading
+import time
+import traceback
+
+
+class CommandWorker(object):
+    """Runs a handler on its own thread for commands queued from the stdout reader,
+    so a slow speech, audio or input call never holds up reading factorio's output.
+    With latest_wins only the newest queued command is kept, older waiting ones are dropped.
+    A command with the same merge_key as the last one waiting is merged into it instead of queued,
+    so merging never changes the order commands are handled in.
+    interval is the least time between handler calls, later commands wait their turn.
+    Latency counts from the since passed to submit, or else from submitting."""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Any],
+        latest_wins=False,
+        merge_key: Callable[[Any], Hashable] | None = None,
+        interval=0.0,
+    ) -> None:
+        self.name = name
+        self.handler = handler
+        self.latest_wins = latest_wins
+        self.merge_key = merge_key
+        self.interval = interval
+        # each command with when it was submitted and its merge key
+        self.queue: deque[tuple[Any, float, Hashable]] = deque()
+        self.lock = threading.Lock()
+        self.has_work = threading.Condition(self.lock)
+        self.idle = threading.Condition(self.lock)
+        self.busy = False
+        # set to a latency.LatencyStats to record how long each stage took
+        self.timings = None
+        self.reset_stats()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def reset_stats(self):
+        self.submitted = 0
+        self.handled = 0
+        self.dropped = 0
+        self.merged = 0
+        self.max_depth = 0
+        self.total_latency = 0.0
+        self.max_latency = 0.0
+
+    def submit(self, arg, since: float | None = None) -> None:
+        now = time.perf_counter()
+        if since is None:
+            since = now
+        elif self.timings:
+            self.timings.record(self.name, "dispatch", now - since)
+        with self.lock:
+            self.submitted += 1
+            key = self.merge_key(arg) if self.merge_key else None
+            if key is not None and self.queue and self.queue[-1][2] == key:
+                self.merged += 1
+                return
+            if self.latest_wins and self.queue:
+                self.dropped += len(self.queue)
+                self.queue.clear()
+            self.queue.append((arg, since, key))
+            depth = len(self.queue)
+            if depth > self.max_depth:
+                self.max_depth = depth
+            if depth == 1:
+                # the worker only waits when the queue is empty
+                self.has_work.notify()
+
+    def _run(self):
+        while True:
+            with self.lock:
+                while not self.queue:
+                    self.has_work.wait()
+                arg, queued, _ = self.queue.popleft()
+                self.busy = True
+            start = time.perf_counter()
+            try:
+                self.handler(arg)
+            except Exception:
+                traceback.print_exc()
+            latency = time.perf_counter() - queued
+            if self.timings:
+                self.timings.record(self.name, "start", start - queued)
+                self.timings.record(self.name, "done", latency)
+            with self.lock:
+                self.busy = False
+                self.handled += 1
+                self.total_latency += latency
+                self.max_latency = max(self.max_latency, latency)
+                self.idle.notify_all()
+            if self.interval:
+                # anything submitted meanwhile keeps queueing, merging or replacing
+                time.sleep(max(0.0, start + self.interval - time.perf_counter()))
+
+    def wait(self, timeout: float | None = None) -> bool:
+        """Wait for everything queued so far to be handled, False on timeout."""
+        with self.lock:
+            return self.idle.wait_for(lambda: not self.queue and not self.busy, timeout)
+
+    def summary(self) -> str:
+        mean = self.total_latency / self.handled if self.handled else 0.0
+        return (
+            f"{self.name}: {self.submitted} queued, {self.handled} handled, "
+            f"{self.dropped} dropped, {self.merged} merged, max depth {self.max_depth}, "
+            f"latency mean {mean * 1000:.1f}ms max {self.max_latency * 1000:.1f}ms"
+        )
@@ -2,68 +2,167 @@ from typing import Any
 import re
 from pathlib import Path
 
+import fa_paths
 from fa_paths import CONFIG
 import config_autogenerated
+import atomic_write
 
 
 class Config_Missing(ValueError):
     pass
 
 
+_section_header = re.compile(r"^[ \t]*\[([^\r\n\]]+)\]")
+# a setting or a commented out setting, with its name
+_setting_line = re.compile(r"[ \t]*(;[ \t]*)?([^=\r\n]*?)[ \t]*=")
+
+
+class Section(object):
+    """The lines of one section of config.ini, kept exactly as read,
+    with the line of each setting and each commented out setting."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.lines: list[str] = []
+        self.settings: dict[str, int] = {}
+        self.commented: dict[str, int] = {}
+        self.duplicates: set[str] = set()
+
+    def append(self, line: str):
+        i = len(self.lines)
+        self.lines.append(line)
+        if m := _setting_line.match(line):
+            key = m.group(2)
+            if m.group(1):
+                self.commented.setdefault(key, i)
+            elif key in self.settings:
+                self.duplicates.add(key)
+            else:
+                self.settings[key] = i
+
+    def end_last_line(self):
+        if self.lines and not self.lines[-1].endswith(("\n", "\r")):
+            self.lines[-1] += "\n"
+
+    def get(self, setting: str) -> str | None:
+        i = self.settings.get(setting, self.commented.get(setting))
+        if i is None:
+            return None
+        return self.lines[i].split("=", 1)[1].strip()
+
+    def set(self, setting: str, value: str, force=False) -> bool:
+        """Returns whether anything changed."""
+        if setting in self.duplicates:
+            raise ValueError(
+                f"Duplicate setting [{setting}] found in section [{self.name}]"
+            )
+        new_line = f"{setting}={value.strip()}"
+        i = self.settings.get(setting)
+        if i is None:
+            i = self.commented.pop(setting, None)
+            if i is None:
+                if not force:
+                    raise Config_Missing(
+                        f"Setting [{setting}] not found in section [{self.name}]"
+                    )
+                self.end_last_line()
+                self.append(new_line + "\n")
+                return True
+            self.settings[setting] = i
+        line = self.lines[i]
+        new_line += line[len(line.rstrip("\r\n")) :]
+        if line == new_line:
+            return False
+        self.lines[i] = new_line
+        return True
+
+
 class Conf_Editor:
     def __init__(self) -> None:
         self.unsaved = False
         self.inContexts = 0
+        # goes up whenever the settings change, for anything caching what they say
+        self.generation = 0
+        self.c: dict[str, Section] = {}
+        # in file order, in case a section name repeats
+        self.sections: list[Section] = []
+        self.loaded: list[str] = []
+        # path, mtime and size of config.ini when last read or written
+        self.file_key: tuple | None = None
 
     def __load(self):
         if self.unsaved:
             raise RuntimeError("Unsaved Changes")
         if not self.inContexts:
             raise RuntimeError("Not in context")
-        section = ""
-        self.c = (c := {section: ""})
-        with CONFIG().open(newline="", encoding="utf8") as fp:
-            for line in fp:
-                if m := re.match(r"(?m)^[ \t]*\[([^\r\n\]]+)\]", line):
-                    section = m.group(1)
-                    c[section] = ""
-                c[section] += line
+        path = CONFIG()
+        file_key = self.__file_key(path)
+        if file_key and file_key == self.file_key:
+            return
+        with atomic_write.open_saved(path, newline="") as fp:
+            lines = fp.readlines()
+        self.file_key = file_key
+        if lines == self.loaded and self.sections:
+            return
+        self.generation += 1
+        self.loaded = lines
+        section = Section("")
+        self.c = {"": section}
+        self.sections = [section]
+        for line in lines:
+            if m := _section_header.match(line):
+                section = self.__add_section(m.group(1))
+            section.append(line)
+
+    def reload_if_changed(self):
+        """Pick up any outside change to config.ini.
+        Does nothing inside a with block, or before config.ini has been found."""
+        if self.inContexts or self.unsaved or "CONFIG" not in fa_paths.paths:
+            return
+        self.inContexts += 1
+        try:
+            self.__load()
+        except OSError:
+            pass
+        finally:
+            self.inContexts -= 1
 
-    def setting(self, setting):
-        return rf"(?m)^[ \t]*{setting}[ \t]*=(.*)$"
+    @staticmethod
+    def __file_key(path: Path):
+        try:
+            st = path.stat()
+        except OSError:
+            return None
+        return (path, st.st_mtime_ns, st.st_size)
 
-    def commented_setting(self, setting):
-        return rf"(?m)^[ \t]*;[ \t]*{setting}[ \t]*=(.*)$"
+    def __add_section(self, name: str) -> Section:
+        section = Section(name)
+        self.c[name] = section
+        self.sections.append(section)
+        return section
 
     def get_setting(self, section, setting):
         if not self.inContexts:
             raise RuntimeError("Not in context")
-        if section not in self.c:
-            self.c[section] = f"[{section}]\n"
-        if m := re.search(self.setting(setting), self.c[section]):
-            return m.group(1).strip()
-        if m := re.search(self.commented_setting(setting), self.c[section]):
-            return m.group(1).strip()
+        if section in self.c:
+            value = self.c[section].get(setting)
+            if value is not None:
+                return value
         raise Config_Missing(f"No {setting} setting found in {section} section.")
 
     def set_setting(self, sec, setting, value, force=False):
         if not self.inContexts:
             raise RuntimeError("Not in context")
-        self.unsaved = True
-        set_string = f"{setting}={value.strip()}"
-        (self.c[sec], n) = re.subn(self.setting(setting), set_string, self.c[sec])
-        if n == 1:
-            return
-        if n > 1:
-            raise ValueError(f"Duplicate setting [{setting}] found in section [{sec}]")
-        cs = self.commented_setting(setting)
-        (self.c[sec], n) = re.subn(cs, set_string, self.c[sec], count=1)
-        if n == 0:
+        section = self.c.get(sec)
+        if section is None:
             if not force:
-                raise Config_Missing(
-                    f"Setting [{setting}] not found in section [{sec}]"
-                )
-            self.c[sec] += set_string + "\n"
+                raise Config_Missing(f"Section [{sec}] not found")
+            self.sections[-1].end_last_line()
+            section = self.__add_section(sec)
+            section.append(f"[{sec}]\n")
+        if section.set(setting, value, force):
+            self.unsaved = True
+            self.generation += 1
 
     def toggle(self, section, setting):
         val = self.get_setting(section, setting)
@@ -74,9 +173,12 @@ class Conf_Editor:
     def __save(self):
         if not self.inContexts:
             raise RuntimeError("Not in context")
-        with CONFIG().open("w", newline="", encoding="utf8") as fp:
-            for section in self.c.values():
-                fp.write(section)
+        lines = [line for section in self.sections for line in section.lines]
+        atomic_write.save(CONFIG(), "".join(lines), newline="")
+        self.loaded = lines
+        # while the save is held back this is still the old file, which is fine
+        # as what we have is newer, and once written it's read once more
+        self.file_key = self.__file_key(CONFIG())
         self.unsaved = False
 
     def __enter__(self):
@@ -114,7 +216,8 @@ def __remake_section_names():
                 print("#cSpell:disable")
                 print("")
                 print("")
-                for k, text in c.c.items():
+                for k, section in c.c.items():
+                    text = "".join(section.lines)
                     class_name = k.replace("-", "_")
                     if not class_name:
                         if m := re.search(r"\bversion=(.*)", text):
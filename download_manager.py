@@ -0,0 +1,112 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future
+from pathlib import Path
+from typing import Any
+
+from factorio_web import download
+
+# downloads allowed to run at the same time
+MAX_CONCURRENT_DOWNLOADS = 4
+# total bytes per second across all downloads, 0 for no limit
+BANDWIDTH_LIMIT = 0
+# seconds between combined progress reports
+REPORT_INTERVAL = 5
+
+
+class BandwidthLimiter(object):
+    """Token bucket shared by every download thread."""
+
+    def __init__(self, rate: int) -> None:
+        self.rate = rate
+        self.tokens = float(rate)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def __call__(self, size: int):
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= size
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0
+        if wait:
+            time.sleep(wait)
+
+
+class DownloadManager(object):
+    """Runs several downloads at once and reports their combined progress.
+    Use as a context manager, leaving the block waits for every download
+    and raises the first error encountered once they have all stopped."""
+
+    def __init__(
+        self,
+        max_concurrent=MAX_CONCURRENT_DOWNLOADS,
+        bandwidth_limit=BANDWIDTH_LIMIT,
+    ) -> None:
+        self.pool = ThreadPoolExecutor(max_concurrent, "download")
+        self.throttle = BandwidthLimiter(bandwidth_limit) if bandwidth_limit else None
+        self.futures: list[Future] = []
+        self.progress: dict[int, tuple[int, int | None]] = {}
+        self.finished = 0
+        self.lock = threading.Lock()
+        self.last_reported = time.time()
+
+    def add(
+        self, url: str, filename: Path, params: dict[str, Any] = {}, sha1=None
+    ) -> Future:
+        key = len(self.futures)
+        self.progress[key] = (0, None)
+
+        def on_progress(done: int, length: int | None):
+            with self.lock:
+                self.progress[key] = (done, length)
+            self.report()
+
+        def run():
+            try:
+                download(url, filename, params, sha1, on_progress, self.throttle)
+            finally:
+                with self.lock:
+                    self.finished += 1
+
+        future = self.pool.submit(run)
+        self.futures.append(future)
+        return future
+
+    def report(self, force=False):
+        with self.lock:
+            if not force and time.time() < self.last_reported + REPORT_INTERVAL:
+                return
+            self.last_reported = time.time()
+            done = sum(p[0] for p in self.progress.values())
+            total = sum(p[1] or 0 for p in self.progress.values())
+            finished = self.finished
+        count = len(self.futures)
+        if total:
+            print(f"{finished} of {count} downloads finished, {done * 100 // total}%")
+        else:
+            print(f"{finished} of {count} downloads finished")
+
+    def wait(self):
+        error = None
+        for future in self.futures:
+            e = future.exception()
+            if e and not error:
+                error = e
+        self.pool.shutdown()
+        if error:
+            raise error
+        if len(self.futures) > 1:
+            self.report(force=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        if exc_type:
+            for future in self.futures:
+                future.cancel()
+            self.pool.shutdown()
+            return
+        self.wait()
@@ -0,0 +1,119 @@
+from collections import deque
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+import hashlib
+import logging
+import re
+
+# lines of each error block kept in memory, the start and the end of it
+HEAD_LINES = 40
+TAIL_LINES = 40
+# distinct error blocks counted before the rest are only counted as other
+MAX_DISTINCT = 100
+LOG_NAME = "fa-launcher-errors.log"
+LOG_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+
+# factorio's log timestamps, which would make every repeat of an error look new
+_timestamp = re.compile(rb"^ *\d+\.\d{3} ")
+
+
+def _describe(lines: list[str]) -> str:
+    # skip the ---- Error ---- banner, it's the same for every error
+    for line in lines:
+        if line.strip("- ") not in ["", "Error"]:
+            return line.strip()
+    return lines[0]
+
+
+class ErrorBlock(object):
+    def __init__(self, first_line: str) -> None:
+        self.first_line = first_line
+        self.count = 1
+
+
+class ErrorCapture(object):
+    """Collects factorio's error blocks with bounded memory.
+    Every line goes to a rotating log file as it arrives,
+    only the start and end of a block are kept to print,
+    and a block repeating an earlier one is counted instead of printed again."""
+
+    def __init__(self, log_path: Path | None = None) -> None:
+        self.log_path = log_path
+        self.log: logging.Logger | None = None
+        if log_path:
+            log_path.parent.mkdir(parents=True, exist_ok=True)
+            handler = RotatingFileHandler(
+                log_path, maxBytes=LOG_BYTES, backupCount=LOG_BACKUPS, encoding="utf8"
+            )
+            handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+            self.log = logging.getLogger(f"fa-errors.{log_path}")
+            self.log.propagate = False
+            self.log.setLevel(logging.INFO)
+            self.log.handlers = [handler]
+        self.blocks: dict[bytes, ErrorBlock] = {}
+        self.total = 0
+        self.other = 0
+        self.capturing = False
+
+    def start(self, line: str) -> None:
+        self.capturing = True
+        self.head: list[str] = []
+        self.tail: deque[str] = deque(maxlen=TAIL_LINES)
+        self.skipped = 0
+        self.hash = hashlib.sha1()
+        self.add(line)
+
+    def add(self, line: str) -> None:
+        if self.log:
+            self.log.info(line)
+        self.hash.update(_timestamp.sub(b"", line.encode()) + b"\n")
+        if len(self.head) < HEAD_LINES:
+            self.head.append(line)
+            return
+        if len(self.tail) == TAIL_LINES:
+            self.skipped += 1
+        self.tail.append(line)
+
+    def finish(self) -> str | None:
+        """End the current block, returning its text if it's not a repeat."""
+        self.capturing = False
+        self.total += 1
+        key = self.hash.digest()
+        block = self.blocks.get(key)
+        if block:
+            block.count += 1
+            return None
+        if len(self.blocks) < MAX_DISTINCT:
+            self.blocks[key] = ErrorBlock(_describe(self.head))
+        else:
+            self.other += 1
+        lines = self.head
+        if self.skipped:
+            lines = lines + [f"... {self.skipped} lines skipped ..."]
+        return "\n".join(lines + list(self.tail))
+
+    def summary(self) -> str | None:
+        if not self.total:
+            return None
+        if self.total == 1:
+            text = "1 error reported."
+        else:
+            text = f"{self.total} errors reported, {len(self.blocks)} different"
+            if self.other:
+                text += f" and {self.other} more not told apart"
+            text += "."
+        repeated = sorted(
+            (b for b in self.blocks.values() if b.count > 1), key=lambda b: -b.count
+        )
+        for block in repeated:
+            text += f"\n{block.count} times: {block.first_line}"
+        if self.log_path:
+            text += f"\nFull text in {self.log_path}"
+        return text
+
+    def close(self):
+        if self.log:
+            for handler in self.log.handlers:
+                handler.close()
+            self.log.handlers = []
@@ -21,6 +21,21 @@ fa.add_argument(
     action="store_true",
     help="This will print the factorio output as bytes",
 )
+fa.add_argument(
+    "--fa-latency",
+    action="store_true",
+    help="Measure how long the mod's output takes to be spoken, played or acted on and print a summary when the game exits",
+)
+fa.add_argument(
+    "--fa-record",
+    metavar="FILE",
+    help="Record factorio's output with its timing to FILE, replay it with python -m stdout_recording FILE",
+)
+fa.add_argument(
+    "--fa-offline",
+    action="store_true",
+    help="Don't contact the mod portal or factorio.com, answer from the launcher's cache of earlier responses instead",
+)
 
 used = parser.add_argument_group(
     title="Dual Use",
@@ -232,5 +247,17 @@ d_print("We're debugging now :)")
 d_print(launch_args)
 if args.fa_debug:
     launch_args.remove("--fa-debug")
+if args.fa_latency:
+    launch_args.remove("--fa-latency")
+if args.fa_offline:
+    launch_args.remove("--fa-offline")
+if args.fa_record:
+    for i, arg in enumerate(launch_args):
+        if arg == "--fa-record":
+            del launch_args[i : i + 2]
+            break
+        if arg.startswith("--fa-record="):
+            del launch_args[i]
+            break
 
 d_print(args)
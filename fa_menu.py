@@ -5,7 +5,9 @@ import abc
 from fa_arg_parse import d_print
 from translations import translate, localised_str, t_print
 import fa_paths
+import config
 from fa_arg_parse import args
+import atomic_write
 
 
 def getAffirmation(prompt: localised_str = ""):
@@ -136,7 +138,16 @@ class Menu(MenuBase):
         pass
 
     def __call__(self, *args):
+        if not self.add_back:
+            return self.show(*args)
+        # files saved while in a submenu are written once it's left
+        with atomic_write.coalesce():
+            return self.show(*args)
+
+    def show(self, *args):
         while True:
+            # the game or an editor may have changed config.ini since the last menu
+            config.current_conf.reload_if_changed()
             options = []
             keys = []
             for submenu in self.items:
@@ -1,7 +1,16 @@
 import fa_menu
-from fa_paths import MOD_NAME
-from mods import mods, ModManager, Dependency, DependencyType, DepCheckResult
-from translations import t_print
+from fa_paths import MOD_NAME, CACHE, FACTORIO_VERSION
+from fa_arg_parse import args as fa_args
+from mods import (
+    mods,
+    ModManager,
+    Dependency,
+    DependencyType,
+    DepCheckResult,
+    IncompatibleDependencies,
+)
+from translations import t_print, translate
+from portal_index import PortalIndex, MAX_AGE as PORTAL_MAX_AGE
 from credentials import NotLoggedIn
 from credentials_menu import sign_in_menu
 
@@ -53,7 +62,11 @@ def get_mod_list(*args):
 
 def check_for_updates(*args):
     mod_manager: ModManager = args[0]
-    actions = mod_manager.check_updates()
+    try:
+        actions = mod_manager.check_updates()
+    except IncompatibleDependencies as e:
+        print(e)
+        return 0
     if DepCheckResult.OK in actions:
         del actions[DepCheckResult.OK]
     if actions:
@@ -70,11 +83,52 @@ def check_for_updates(*args):
     return 0
 
 
+def search_portal(*args):
+    mod_manager: ModManager = args[0]
+    index = PortalIndex(CACHE() / "mod-portal.sqlite")
+    try:
+        if not fa_args.fa_offline and index.age() > PORTAL_MAX_AGE:
+            t_print(("fa-l.updating-portal-index",))
+            try:
+                index.refresh()
+            except OSError as e:
+                print(e)
+        query = input(translate(("fa-l.search-prompt",)))
+        factorio_version = ".".join(FACTORIO_VERSION().split(".")[:2])
+        results = index.search(query, factorio_version)
+    finally:
+        index.close()
+    if not results:
+        t_print(("fa-l.search-no-results",))
+        return 0
+    options = [("gui.cancel",)]
+    for r in results:
+        options.append(f"{r.title} ({r.name} {r.latest_version}): {r.summary}")
+    i = fa_menu.select_option(options, ("fa-l.search-select-mod",), one_indexed=False)
+    if i == 0:
+        return 0
+    selected = results[i - 1]
+    if selected.name in mod_manager.dict:
+        t_print(("fa-l.mod-already-installed", selected.title))
+        return 0
+    if not fa_menu.getAffirmation(("fa-l.install-mod", selected.title)):
+        return 0
+    try:
+        all_deps = mod_manager.expand_dependencies([Dependency.from_str(selected.name)])
+        mod_manager.exec_dep_check_res(mod_manager.check_deps(all_deps))
+    except IncompatibleDependencies as e:
+        print(e)
+    except NotLoggedIn:
+        fa_menu.new_menu("Login", sign_in_menu, top_level=False)()
+    return 0
+
+
 mod_menu = _mod_menu(
     ("gui-menu.mods",),
     fa_menu.parse_menu_dict(
         {
             ("gui-update.check-updates-now",): check_for_updates,
+            ("fa-l.search-portal",): search_portal,
             get_names: {"enabled": enable_disable_submenu()},
         }
     )[0],
@@ -21,6 +21,8 @@ __all__ = [
     "SCRIPT_OUTPUT",
     "TEMP",
     "FACTORIO_VERSION",
+    "CACHE",
+    "SESSION_LOGS",
 ]
 
 
@@ -57,6 +59,8 @@ SCRIPT_OUTPUT = lambda force=False: get_path(
     "SCRIPT_OUTPUT", find_everything_else, force
 )
 TEMP = lambda force=False: get_path("TEMP", find_everything_else, force)
+CACHE = lambda force=False: get_path("CACHE", find_everything_else, force)
+SESSION_LOGS = lambda force=False: get_path("SESSION_LOGS", find_everything_else, force)
 FACTORIO_VERSION = lambda force=False: factorio_ver
 
 steam = False
@@ -340,6 +344,8 @@ def find_everything_else():
     paths["PLAYER_DATA"] = player_data_folder / "player-data.json"
     paths["TEMP"] = WRITE_DIR() / "temp"
     paths["SCRIPT_OUTPUT"] = WRITE_DIR() / "script-output"
+    paths["CACHE"] = WRITE_DIR() / "fa-launcher-cache"
+    paths["SESSION_LOGS"] = WRITE_DIR() / "fa-launcher-logs"
 
 
 def get_steam_player_data_folder():
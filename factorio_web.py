@@ -1,15 +1,23 @@
+import os
 import time
+import threading
+import hashlib
 import urllib.parse
 import urllib.request
 import urllib.error
 import urllib.response
 import json
-import http, http.cookiejar
+import http, http.cookiejar, http.client
+from pathlib import Path
 from collections import defaultdict
-from typing import TypedDict, NotRequired, Any, Type
+from typing import TypedDict, NotRequired, Any, Type, Callable
 from urllib.parse import quote
+from contextlib import contextmanager
 from http.client import HTTPSConnection, HTTPConnection, RemoteDisconnected
 
+from fa_arg_parse import args, d_print
+import atomic_write
+
 
 LOGIN_API = "https://auth.factorio.com/api-login"
 
@@ -89,55 +97,310 @@ def append_query(url: str, params: dict[str, Any] = {}):
     return url
 
 
-def get_json(url: str, params: dict[str, Any] = {}):
-    """Warning: not thread safe."""
-    with request(append_query(url, params)) as response:
-        return json.load(response)
+# Seconds a cached json response is trusted before asking the server again.
+# Longest matching url prefix wins, urls not listed here are never cached.
+cache_ttls: dict[str, int] = {
+    "https://mods.factorio.com/api/mods": 10 * 60,
+    "https://updater.factorio.com/get-available-versions": 60 * 60,
+    "https://factorio.com/api/latest-releases": 60 * 60,
+}
+
+
+class NotCached(LookupError):
+    """Raised in offline mode when a response was never cached."""
+
+
+class CacheEntry(TypedDict):
+    url: str
+    fetched: float
+    etag: NotRequired[str]
+    last_modified: NotRequired[str]
+    body: Any
+
+
+class ResponseCache(object):
+    """On disk cache of json responses that are revalidated with ETag and Last-Modified."""
+
+    def __init__(self, folder: Path) -> None:
+        self.folder = folder
+
+    def _path(self, url: str):
+        return self.folder / (hashlib.sha1(url.encode()).hexdigest() + ".json")
+
+    def get(self, url: str) -> CacheEntry | None:
+        try:
+            with open(self._path(url), encoding="utf8") as fp:
+                entry: CacheEntry = json.load(fp)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if entry.get("url") != url:
+            return None
+        return entry
+
+    def put(self, entry: CacheEntry):
+        path = self._path(entry["url"])
+        try:
+            self.folder.mkdir(parents=True, exist_ok=True)
+            atomic_write.replace_file(path, json.dumps(entry, ensure_ascii=False))
+        except OSError as e:
+            d_print(f"Unable to cache {entry['url']}: {e}")
+
 
+response_cache: ResponseCache | None = None
 
-def download(url, filename, params: dict[str, Any] = {}):
+
+def enable_cache(folder: Path):
+    global response_cache
+    response_cache = ResponseCache(folder)
+
+
+def get_ttl(url: str) -> int | None:
+    matches = [prefix for prefix in cache_ttls if url.startswith(prefix)]
+    if not matches:
+        return None
+    return cache_ttls[max(matches, key=len)]
+
+
+def get_json(url: str, params: dict[str, Any] = {}, cache=True):
     url = append_query(url, params)
-    with open(filename, "wb") as fp, opener.open(url) as dl:
-        # print(f"saving {url} to {filename}")
-        length = dl.getheader("content-length")
-        buff_size = 4096
+    ttl = get_ttl(url)
+    if response_cache is None or ttl is None or not cache:
+        with request(url) as response:
+            return json.load(response)
+    return get_json_cached(response_cache, url, ttl)
+
+
+def get_json_cached(cache: ResponseCache, url: str, ttl: int):
+    entry = cache.get(url)
+    if entry and (args.fa_offline or time.time() - entry["fetched"] < ttl):
+        return entry["body"]
+    if args.fa_offline:
+        raise NotCached(url)
+    headers = {}
+    if entry and "etag" in entry:
+        headers["If-None-Match"] = entry["etag"]
+    if entry and "last_modified" in entry:
+        headers["If-Modified-Since"] = entry["last_modified"]
+    try:
+        with request(url, headers=headers) as response:
+            if response.status == 304 and entry:
+                response.read()
+                entry["fetched"] = time.time()
+                cache.put(entry)
+                return entry["body"]
+            body = json.load(response)
+            if response.status != 200:
+                return body
+            entry = {"url": url, "fetched": time.time(), "body": body}
+            if etag := response.getheader("ETag"):
+                entry["etag"] = etag
+            if modified := response.getheader("Last-Modified"):
+                entry["last_modified"] = modified
+            cache.put(entry)
+            return body
+    except (OSError, http.client.HTTPException) as e:
+        if not entry:
+            raise
+        d_print(f"Network error, using stale cached response for {url}: {e}")
+        return entry["body"]
+
+
+class DownloadFailed(Exception):
+    """Raised when a download could not be completed after retrying."""
+
+
+class ChecksumMismatch(DownloadFailed):
+    """Raised when a finished download doesn't match the expected sha1."""
+
+
+# attempts made for one download, each resumes where the last one stopped
+DOWNLOAD_ATTEMPTS = 5
+# read size adapts between these to give roughly 10 reads a second
+MIN_BUFFER = 64 * 1024
+MAX_BUFFER = 4 * 1024 * 1024
 
-        if length:
-            length = int(length)
+
+class ConsoleProgress(object):
+    """Reports download progress to the console at most every 5 seconds."""
+
+    def __init__(self) -> None:
+        self.last_percent = -1
+        self.last_reported = time.time()
+        self.announced = False
+
+    def __call__(self, bytes_done: int, length: int | None):
+        if not length:
+            return
+        if not self.announced:
+            self.announced = True
             if length > 4096 * 20:
                 print(f"Downloading {length} bytes")
+        percent = bytes_done * 100 // length
+        if percent > self.last_percent and time.time() >= 5 + self.last_reported:
+            print(f"{percent}%")
+            self.last_percent = percent
+            self.last_reported = time.time()
 
-        bytes_done = 0
-        last_percent = -1
-        last_reported = time.time()
-        while True:
-            buffer = dl.read(buff_size)
-            if not buffer:
-                break
-            fp.write(buffer)
-            bytes_done += len(buffer)
-            if length:
-                percent = bytes_done * 100 // length
-                if percent > last_percent and time.time() >= 5 + last_reported:
-                    print(f"{percent}%")
-                    last_percent = percent
-                    last_reported = time.time()
+    def done(self, length: int | None):
         if length and length > 4096 * 20:
             print("Done")
 
 
-connection_pool: dict[Type, dict[str, HTTPConnection]] = {
-    HTTPConnection: {},
-    HTTPSConnection: {},
-}
+ProgressFunc = Callable[[int, int | None], None]
+
+
+class _PartialDownload(object):
+    """A .part file along with the running hash of what's in it."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.sha1 = hashlib.sha1()
+        self.size = 0
+        if path.exists():
+            with open(path, "rb") as fp:
+                while chunk := fp.read(MAX_BUFFER):
+                    self.sha1.update(chunk)
+                    self.size += len(chunk)
 
+    def restart(self):
+        self.sha1 = hashlib.sha1()
+        self.size = 0
+        self.path.unlink(missing_ok=True)
 
-def request(url: str, method="GET"):
-    """Warning: not thread safe.
-    This function uses a connection pool with a single connection for each requested net location.
+
+def _download_attempt(
+    url: str,
+    part: _PartialDownload,
+    progress: ProgressFunc,
+    throttle: Callable[[int], None] | None,
+):
+    req = urllib.request.Request(url)
+    if part.size:
+        req.add_header("Range", f"bytes={part.size}-")
+    try:
+        dl = opener.open(req)
+    except urllib.error.HTTPError as e:
+        if e.code == 416 and part.size:
+            # our partial file doesn't fit what the server has, start over
+            part.restart()
+        raise
+    with dl:
+        if part.size and dl.status != 206:
+            # the server ignored our range request and is sending everything
+            part.restart()
+        length = dl.getheader("content-length")
+        length = int(length) + part.size if length else None
+        buff_size = MIN_BUFFER
+        with open(part.path, "ab") as fp:
+            while True:
+                start = time.perf_counter()
+                buffer = dl.read(buff_size)
+                elapsed = time.perf_counter() - start
+                if not buffer:
+                    break
+                fp.write(buffer)
+                part.sha1.update(buffer)
+                part.size += len(buffer)
+                progress(part.size, length)
+                if throttle:
+                    throttle(len(buffer))
+                if len(buffer) == buff_size and elapsed < 0.05:
+                    buff_size = min(buff_size * 2, MAX_BUFFER)
+                elif elapsed > 0.2:
+                    buff_size = max(buff_size // 2, MIN_BUFFER)
+    if length and part.size < length:
+        raise DownloadFailed(f"Connection closed after {part.size} of {length} bytes")
+    return length
+
+
+def download(
+    url,
+    filename,
+    params: dict[str, Any] = {},
+    sha1: str | None = None,
+    progress: ProgressFunc | None = None,
+    throttle: Callable[[int], None] | None = None,
+):
+    """Download url to filename.
+    Data goes to filename.part first and an interrupted transfer is resumed with a Range request.
+    If sha1 is given the data is checked against it before being renamed to filename.
+    throttle is called with the size of each chunk read and may sleep to limit bandwidth."""
+    url = append_query(url, params)
+    filename = Path(filename)
+    console = ConsoleProgress() if progress is None else None
+    progress = progress or console
+    assert progress
+    part = _PartialDownload(filename.with_name(filename.name + ".part"))
+    if part.size and sha1 and part.sha1.hexdigest() == sha1:
+        # finished last time but wasn't renamed
+        length = part.size
+    else:
+        for attempt in range(DOWNLOAD_ATTEMPTS):
+            try:
+                length = _download_attempt(url, part, progress, throttle)
+            except urllib.error.HTTPError as e:
+                if e.code != 416 and 400 <= e.code < 500:
+                    raise
+                error = e
+            except (OSError, http.client.HTTPException, DownloadFailed) as e:
+                error = e
+            else:
+                break
+            if attempt == DOWNLOAD_ATTEMPTS - 1:
+                continue
+            print(f"Download interrupted, resuming: {error}")
+            time.sleep(min(2**attempt, 30))
+        else:
+            raise DownloadFailed(f"Unable to download {filename.name}: {error}")
+    if sha1 and (got := part.sha1.hexdigest()) != sha1:
+        part.restart()
+        raise ChecksumMismatch(f"{filename.name} sha1 {got} does not match {sha1}")
+    os.replace(part.path, filename)
+    if console:
+        console.done(length)
+
+
+# Maximum number of simultaneous requests, and so open connections, to a single host
+MAX_CONNECTIONS_PER_HOST = 4
+
+
+class HostPool(object):
+    """A bounded set of keep-alive connections to one net location."""
+
+    def __init__(self, con_type: Type[HTTPConnection], host: str, port: int | None):
+        self.con_type = con_type
+        self.host = host
+        self.port = port
+        self.idle: list[HTTPConnection] = []
+        self.lock = threading.Lock()
+        self.slots = threading.BoundedSemaphore(MAX_CONNECTIONS_PER_HOST)
+
+    def get(self) -> HTTPConnection:
+        self.slots.acquire()
+        with self.lock:
+            if self.idle:
+                return self.idle.pop()
+        return self.con_type(self.host, self.port)
+
+    def put(self, con: HTTPConnection):
+        with self.lock:
+            self.idle.append(con)
+        self.slots.release()
+
+
+connection_pool: dict[tuple[Type, str], HostPool] = {}
+_connection_pool_lock = threading.Lock()
+
+
+@contextmanager
+def request(url: str, method="GET", headers: dict[str, str] = {}):
+    """Context manager that yields the http response for the url.
+    This function uses a pool of up to MAX_CONNECTIONS_PER_HOST connections for each requested net location.
     The motivation for this is for mod dependency analysis
     where each mod requires it's own request to get the dependencies.
-    Reusing the connection dramatically speeds the results."""
+    Reusing the connections dramatically speeds the results,
+    and having several lets those requests run in parallel threads.
+    A connection is returned to the pool when the with block exits."""
     parts = urllib.parse.urlparse(url)
     assert parts.hostname
     if parts.query:
@@ -151,19 +414,33 @@ def request(url: str, method="GET"):
             con_type = HTTPSConnection
         case _:
             raise ValueError("Unsupported scheme", parts.scheme)
-    pool = connection_pool[con_type]
-    for i in range(2):
-        if parts.netloc not in pool:
-            pool[parts.netloc] = con_type(parts.hostname, parts.port)
-        con = pool[parts.netloc]
-        try:
-            con.request(method, url)
-            ret = con.getresponse()
-        except RemoteDisconnected:
-            del pool[parts.netloc]
+    with _connection_pool_lock:
+        pool_key = (con_type, parts.netloc)
+        if pool_key not in connection_pool:
+            connection_pool[pool_key] = HostPool(con_type, parts.hostname, parts.port)
+        pool = connection_pool[pool_key]
+    con = pool.get()
+    try:
+        for i in range(2):
+            try:
+                con.request(method, url, headers=headers)
+                ret = con.getresponse()
+            except (RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                # a stale keep-alive connection, closing lets it reconnect
+                con.close()
+            else:
+                break
         else:
-            return ret
-    raise Exception("repeated disconnects")
+            raise Exception("repeated disconnects")
+        yield ret
+        if not ret.isclosed():
+            # unread data would corrupt the next response on this connection
+            con.close()
+    except BaseException:
+        con.close()
+        raise
+    finally:
+        pool.put(con)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,82 @@
+from bisect import bisect_left
+import threading
+
+from fa_arg_parse import args
+
+# histogram bucket upper bounds in seconds, 4 per decade from 10us up
+BUCKETS = [b * 10**e for e in range(-5, 2) for b in (1, 2, 5, 7.5)] + [float("inf")]
+# in pipeline order, each measured from when the line was read from factorio's stdout
+STAGES = ["decode", "dispatch", "start", "done"]
+
+enabled: bool = args.fa_latency
+
+
+class Histogram(object):
+    def __init__(self) -> None:
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float):
+        self.counts[bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p'th percentile."""
+        target = p * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max)
+        return self.max
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f}"
+
+
+class LatencyStats(object):
+    """Per command histograms of how long after being read each stage was reached."""
+
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.histograms: dict[tuple[str, str], Histogram] = {}
+
+    def record(self, command: str, stage: str, seconds: float):
+        with self.lock:
+            key = (command, stage)
+            if key not in self.histograms:
+                self.histograms[key] = Histogram()
+            self.histograms[key].add(seconds)
+
+    def summary(self) -> str:
+        with self.lock:
+            histograms = dict(self.histograms)
+        columns = ["command", "stage", "count", "mean", "p50", "p90", "p99", "max"]
+        rows = [columns]
+        order = {stage: i for i, stage in enumerate(STAGES)}
+        for command, stage in sorted(histograms, key=lambda k: (k[0], order[k[1]])):
+            h = histograms[command, stage]
+            rows.append(
+                [command, stage, str(h.count), _ms(h.total / h.count)]
+                + [_ms(h.percentile(p)) for p in [0.5, 0.9, 0.99]]
+                + [_ms(h.max)]
+            )
+        widths = [max(len(row[i]) for row in rows) for i in range(len(columns))]
+        lines = ["Latency in ms since the line was read from factorio:"]
+        for row in rows:
+            names = [c.ljust(w) for c, w in zip(row[:2], widths)]
+            numbers = [c.rjust(w) for c, w in zip(row[2:], widths[2:])]
+            lines.append("  ".join(names + numbers))
+        return "\n".join(lines)
+
+    def reset(self):
+        with self.lock:
+            self.histograms = {}
+
+
+stats = LatencyStats()
@@ -7,10 +7,12 @@ import sys
 import io
 from pathlib import Path
 
-from playsound import playsound  # cSpell: words playsound
-
-
 from fa_arg_parse import launch_args, args
+from fa_paths import WRITE_DIR, SESSION_LOGS
+from error_capture import ErrorCapture, LOG_NAME
+from session_log import SessionLog
+import latency
+import atomic_write
 
 
 start_saving = str(Path(__file__).parent / "r/shh.wav")
@@ -26,7 +28,15 @@ errorB_end = re.compile(r" *\d+\.\d{3} ")
 
 # There are a number of commands which are printed every tick or closer to it. These commands need to be filtered from
 # debug output else the console floods and freezes NVDA. SetCursor is mouse movement, and acmd is for playing sound.
-debug_filter = re.compile(r"^(acmd|setCursor) ")
+debug_filter = (b"acmd ", b"setCursor ")
+
+
+def _decode(data: bytes, b_line: bytes) -> str:
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError as e:
+        print(b_line)
+        raise e
 
 
 def process_game_stdout(
@@ -34,79 +44,104 @@ def process_game_stdout(
     announce_press_e,
     tweak_modified: tuple[Path, int] | None,
     config_reset_process_handle: subprocess.Popen,
+    launchers_mod_api=None,
+    error_log: Path | None = None,
 ):
-    import launchers_mod_api
+    """Act on factorio's output.
+    Pass a stand in for launchers_mod_api to run without the game, see stdout_recording.
+    Errors are also written to error_log if given."""
+    if launchers_mod_api is None:
+        import launchers_mod_api
 
-    error_buffer: list[str] | None = None
-    player_index = ""
+    # keyed by bytes so command lines can be dispatched without decoding the whole line
+    player_specific_commands = {
+        name.encode(): func
+        for name, func in launchers_mod_api.player_specific_commands.items()
+    }
+    global_commands = {
+        name.encode(): func for name, func in launchers_mod_api.global_commands.items()
+    }
+    errors = ErrorCapture(error_log)
+    player_index = b""
     restarting = False
     waiting_on_config_reset = False
     here_doc_end = None
     cmd = None
     arg = None
+    timed = latency.enabled
+    read_time = None
+    cmd_read_time = None
     for b_line in stdout:
+        if timed:
+            read_time = time.perf_counter()
         if waiting_on_config_reset:
             config_reset_process_handle.terminate()
         if b_line.startswith(b"\xef\xb7"):
             sys.stdout.buffer.write(b_line)
             sys.stdout.buffer.flush()
             continue
-        try:
-            line: str = b_line.decode("utf-8").rstrip("\r\n")
-        except UnicodeDecodeError as e:
-            print(b_line)
-            raise e
         if args.fa_debug:
             if args.fa_stdout_bytes:
                 print(b_line)
-            elif not debug_filter.match(line):
+            elif not b_line.startswith(debug_filter):
                 sys.stdout.buffer.write(b_line)
                 sys.stdout.buffer.flush()
+        stripped = b_line.rstrip(b"\r\n")
         if here_doc_end and isinstance(arg, str):
+            line = _decode(stripped, b_line)
             if line == here_doc_end:
                 if cmd:
-                    cmd(arg)
+                    cmd(arg, cmd_read_time)
                     cmd = None
                 arg = None
                 here_doc_end = None
             else:
                 arg += line + "\n"
             continue
-        if error_buffer is not None:
+        if errors.capturing:
+            line = _decode(stripped, b_line)
             b = errorB_end.match(line)
             if not b:
-                error_buffer.append(line)
+                errors.add(line)
             if b or errorA_end.fullmatch(line):
-                print("\n".join(error_buffer))
-                launchers_mod_api.speak_interruptable_text("Printed error to console.")
-                error_buffer = None
+                # repeats of an earlier error are only counted
+                if text := errors.finish():
+                    print(text)
+                    launchers_mod_api.speak("Printed error to console.")
             continue
 
-        parts = line.split(" ", 1)
-        if len(parts) == 2:
-            if parts[0] in launchers_mod_api.player_specific_commands:
-                more_parts = parts[1].split(" ", 1)
-                if not player_index or more_parts[0] == player_index:
-                    cmd = launchers_mod_api.player_specific_commands[parts[0]]
-                arg = more_parts[1]
-            elif parts[0] in launchers_mod_api.global_commands:
-                cmd = launchers_mod_api.global_commands[parts[0]]
-                arg = parts[1]
+        # commands arrive at up to tick rate, so they are found on the raw bytes
+        # and only their argument is decoded
+        name, sep, rest = stripped.partition(b" ")
+        if sep:
+            if name in player_specific_commands:
+                index, _, b_arg = rest.partition(b" ")
+                if not player_index or index == player_index:
+                    cmd = player_specific_commands[name]
+                arg = _decode(b_arg, b_line)
+            elif name in global_commands:
+                cmd = global_commands[name]
+                arg = _decode(rest, b_line)
             if arg:
+                if timed and cmd:
+                    decoded = time.perf_counter() - read_time
+                    latency.stats.record(name.decode(), "decode", decoded)
                 if arg.startswith("<<<"):
                     here_doc_end = arg[3:]
+                    cmd_read_time = read_time
                     arg = ""
                 else:
                     if cmd:
-                        cmd(arg)
+                        cmd(arg, read_time)
                     cmd = None
                     arg = None
                 continue
 
+        line = _decode(stripped, b_line)
         if line.endswith("Saving finished"):
-            playsound(save_complete)
+            launchers_mod_api.play_sound(save_complete)
         elif re_save_started.search(line):
-            playsound(start_saving)
+            launchers_mod_api.play_sound(start_saving)
         elif line.endswith("Restarting Factorio"):
             restarting = True
         elif line.endswith("Goodbye"):
@@ -115,10 +150,10 @@ def process_game_stdout(
             restarting = False
         elif m := re_player_join_game.search(line):
             if not player_index:
-                player_index = str(int(m[1]) + 1)
-                print(f"Player index now {player_index}")
+                player_index = str(int(m[1]) + 1).encode()
+                print(f"Player index now {player_index.decode()}")
         elif "Quitting multiplayer connection." in line:
-            player_index = ""
+            player_index = b""
             print(f"Player index cleared")
         elif tweak_modified and "Loading map" in line:
             os.utime(tweak_modified[0], (tweak_modified[1], tweak_modified[1]))
@@ -126,17 +161,24 @@ def process_game_stdout(
         elif announce_press_e and line.endswith("Factorio initialised"):
             announce_press_e = False
             if config_reset_process_handle:
-                launchers_mod_api.speak_interruptable_text(
-                    "Press e to reset config file."
-                )
+                launchers_mod_api.speak("Press e to reset config file.")
                 waiting_on_config_reset = True
             else:
-                launchers_mod_api.speak_interruptable_text("Press e to continue.")
+                launchers_mod_api.speak("Press e to continue.")
         elif errorA_started.fullmatch(line) or errorB_started.match(line):
-            launchers_mod_api.speak_interruptable_text(
+            launchers_mod_api.speak(
                 "Error Reported. Will print to console once game exits. Press e twice to exit and restart last save."
             )
-            error_buffer = [line]
+            errors.start(line)
+    if errors.capturing:
+        # the game exited part way through an error
+        if text := errors.finish():
+            print(text)
+    if summary := errors.summary():
+        print(summary)
+        launchers_mod_api.speak(summary.splitlines()[0])
+    errors.close()
+    launchers_mod_api.finish_dispatch()
 
 
 def just_launch():
@@ -167,6 +209,8 @@ def launch_with_params(
     config_reset=False,
 ):
     params = launch_args + params
+    # the game reads config.ini and player-data.json, make sure they're on disk
+    atomic_write.flush()
     if "--version" in launch_args or "-v" in launch_args:
         proc = subprocess.Popen(params, stdout=sys.stdout.buffer)
         proc.wait()
@@ -187,13 +231,21 @@ def launch_with_params(
     try:
         print("Launching")
         proc = subprocess.Popen(params, stdout=subprocess.PIPE, stdin=sys.stdin.buffer)
+        stdout = proc.stdout
+        if args.fa_record:
+            from stdout_recording import record
+
+            stdout = record(stdout, Path(args.fa_record))
+        stdout = SessionLog(SESSION_LOGS()).tee(stdout)
         threading.Thread(
             target=process_game_stdout,
             args=(
-                proc.stdout,
+                stdout,
                 announce_press_e,
                 tweak_modified_data,
                 proc if config_reset else None,
+                None,
+                WRITE_DIR() / LOG_NAME,
             ),
             daemon=True,
         ).start()
@@ -214,6 +266,6 @@ def launch_with_params(
 def time_to_exit():
     import launchers_mod_api
 
-    launchers_mod_api.speak_interruptable_text("Goodbye Factorio")
+    launchers_mod_api.speak("Goodbye Factorio")
     time.sleep(1.5)
     raise SystemExit
@@ -3,11 +3,14 @@ import re
 import os
 from contextlib import ExitStack
 from pyperclip import copy
+from playsound import playsound  # cSpell: words playsound
 import accessible_output2.outputs.auto
 
 
 from fa_arg_parse import d_print
 from fa_launcher_audio import AudioManager
+from command_queue import CommandWorker
+import latency
 from translations import translate
 from mods import mods, dual_path
 
@@ -23,6 +26,8 @@ _audio_exit_stack: ExitStack | None = None
 audio_manager: AudioManager | None = None
 audio_path: dual_path | None = None
 FA_MOD_FILTER = re.compile(r"FactorioAccess")
+# seconds between mouse moves, one per frame is as often as it can matter
+CURSOR_MOVE_INTERVAL = 1 / 60
 
 
 def audio_data_provider(name: str) -> bytes:
@@ -92,10 +97,56 @@ def handle_acmd(json_string: str):
         d_print(f"acmd: invalid JSON: {e}")
 
 
+# acmds that only set state, the same one again right after it would change nothing
+# anything else, like playing a sound, has to happen as many times as it was sent
+# found without parsing the json, this runs on the stdout reader for every acmd
+_idempotent_acmd = re.compile(r'"command"\s*:\s*"(?:patch|stop)"')
+
+
+def acmd_merge_key(json_string: str):
+    if _idempotent_acmd.search(json_string):
+        return json_string
+    return None
+
+
+# Each kind of output runs on its own thread so a slow one can't hold up the others or the stdout reader.
+# Speech interrupts itself anyway and only the latest cursor position matters, so those only keep the newest.
+speech = CommandWorker("out", speak_interruptable_text, latest_wins=True)
+cursor = CommandWorker(
+    "setCursor", setCursor, latest_wins=True, interval=CURSOR_MOVE_INTERVAL
+)
+audio = CommandWorker("acmd", handle_acmd, merge_key=acmd_merge_key)
+clipboard = CommandWorker("copy", copy)
+sounds = CommandWorker("sounds", playsound)
+workers = [speech, cursor, audio, clipboard, sounds]
+if latency.enabled:
+    for worker in workers:
+        worker.timings = latency.stats
+
+
+def speak(text: str):
+    speech.submit(text)
+
+
+def play_sound(path: str):
+    sounds.submit(path)
+
+
+def finish_dispatch(timeout=2.0):
+    """Let queued commands finish once the game's output ends and report on the queues."""
+    for worker in workers:
+        worker.wait(timeout)
+        d_print(worker.summary())
+        worker.reset_stats()
+    if latency.enabled:
+        print(latency.stats.summary())
+        latency.stats.reset()
+
+
 player_specific_commands = {
-    "out": speak_interruptable_text,
-    "setCursor": setCursor,
-    "copy": copy,
-    "acmd": handle_acmd,
+    "out": speech.submit,
+    "setCursor": cursor.submit,
+    "copy": clipboard.submit,
+    "acmd": audio.submit,
 }
 global_commands = {}
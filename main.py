@@ -16,6 +16,7 @@ import os
 
 
 import fa_paths
+import factorio_web
 import multiplayer
 from fa_menu import *
 import modify_config
@@ -30,10 +31,12 @@ from version import version
 from credentials_menu import sign_in_menu
 from github_mods import update_all
 from launcher_update import check_and_update
+from session_log_menu import session_log_menu
 
 
 
 def main():
+    factorio_web.enable_cache(fa_paths.CACHE())
     menu = {
         "Launch last played": launch_and_monitor.just_launch,
         ("gui-menu.single-player-menu",): {
@@ -60,6 +63,7 @@ def main():
             ("gui-menu.connect-to-address",): launch_and_monitor.connect_to_address_menu,
         },
         ("gui-menu.mods",): mod_menu,
+        ("fa-l.session-logs",): session_log_menu,
         ("gui-menu.about",): {
             "Factorio": {
                 "_desc": fa_paths.FACTORIO_VERSION,
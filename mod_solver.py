@@ -0,0 +1,232 @@
+from collections import Counter
+from typing import Mapping, NamedTuple
+
+from mods import (
+    Dependency,
+    Dependencies,
+    DependencyType,
+    IncompatibleDependencies,
+    ModVersion,
+    ModVersions,
+    VerComp,
+)
+
+# give up rather than hang on pathological mod sets
+MAX_SEARCH_STEPS = 200000
+# don't bother minimizing explanations for requests bigger than this
+MAX_MINIMIZE = 32
+
+
+def is_required(dep: Dependency):
+    # matches expand_dependencies, anything stronger than optional gets installed
+    return dep.type > DependencyType.OPTIONAL
+
+
+class Constraint(NamedTuple):
+    dep: Dependency
+    source: str  # "name version" of the mod asking, empty when requested directly
+
+    def __str__(self) -> str:
+        return f"{self.source or 'requested'}: {self.dep}"
+
+
+class UnsolvableDependencies(IncompatibleDependencies):
+    """No choice of mod versions satisfies all the dependencies.
+    conflict is a smallest set of the requested dependencies that still can't be satisfied together.
+    reasons are the constraints on the mod that most often had no acceptable version."""
+
+    def __init__(
+        self, conflict: list[Dependency], mod: str, reasons: list[Constraint]
+    ) -> None:
+        super().__init__(conflict, mod, reasons)
+        self.conflict = conflict
+        self.mod = mod
+        self.reasons = reasons
+
+    def __str__(self) -> str:
+        lines = ["These can't all be satisfied: " + ", ".join(map(str, self.conflict))]
+        if self.mod:
+            lines.append(f"No version of {self.mod} fits:")
+            lines += [f"    {r}" for r in self.reasons]
+        return "\n".join(lines)
+
+
+class SearchLimitReached(IncompatibleDependencies):
+    """The search gave up before finding out if the dependencies can be satisfied."""
+
+    def __init__(self, deps: list[Dependency] | None = None) -> None:
+        super().__init__(deps)
+        self.deps = deps or []
+
+    def __str__(self) -> str:
+        return (
+            f"Gave up after {MAX_SEARCH_STEPS} steps looking for versions that fit: "
+            + ", ".join(map(str, self.deps))
+        )
+
+
+class ModSolver(object):
+    """Backtracking search for one version of each required mod.
+    A mod's current version is tried first, then the rest newest first,
+    and the mod with the fewest candidates goes next.
+    Assignments known to fail are remembered so they are never searched twice."""
+
+    def __init__(
+        self,
+        by_name_version: Mapping[str, ModVersions],
+        current: Mapping[str, ModVersion] = {},
+    ) -> None:
+        self.by_name_version = by_name_version
+        self.current = current
+
+    def solve(self, deps: list[Dependency]) -> Dependencies:
+        """Returns exact version dependencies for every mod to be installed,
+        except the ranges asked for when the current version is kept,
+        plus conflicts and optional ranges for the mods that are left out."""
+        try:
+            chosen, constraints = self._search(deps)
+        except SearchLimitReached:
+            raise SearchLimitReached(deps) from None
+        if chosen is None:
+            counts = self.failures
+            mod = max(counts, key=counts.__getitem__) if counts else ""
+            reasons = self.failure_reasons.get(mod, [])
+            raise UnsolvableDependencies(self._minimize(deps), mod, reasons)
+        ret = Dependencies()
+        for name, ver in chosen.items():
+            if ver == self.current.get(name):
+                ret += self._merge_kept(name, constraints[name])
+                continue
+            v = VerComp(ver, 0)
+            ret += Dependency(DependencyType.NORMAL, name, v, v)
+        for name, cons in constraints.items():
+            if name not in chosen:
+                ret += self._merge_optional(name, cons)
+        return ret
+
+    def _minimize(self, deps: list[Dependency]):
+        """Drop each requested dependency that isn't needed to cause the failure."""
+        if len(deps) > MAX_MINIMIZE:
+            return deps
+        conflict = list(deps)
+        # all the attempts share one search's worth of steps
+        budget = MAX_SEARCH_STEPS
+        for dep in deps:
+            attempt = [d for d in conflict if d is not dep]
+            try:
+                chosen, _ = self._search(attempt, budget)
+            except SearchLimitReached:
+                break
+            finally:
+                budget -= self.steps
+            if chosen is None:
+                conflict = attempt
+        return conflict
+
+    @staticmethod
+    def _merge_kept(name: str, cons: list[Constraint]):
+        low = max(c.dep.min for c in cons)
+        high = min(c.dep.max for c in cons)
+        return Dependency(DependencyType.NORMAL, name, low, high)
+
+    @staticmethod
+    def _merge_optional(name: str, cons: list[Constraint]):
+        if any(c.dep.type == DependencyType.CONFLICT for c in cons):
+            return Dependency.from_str(f"! {name}")
+        low = max(c.dep.min for c in cons)
+        high = min(c.dep.max for c in cons)
+        if low > high:
+            return Dependency.from_str(f"! {name}")
+        return Dependency(DependencyType.OPTIONAL, name, low, high)
+
+    def _search(self, deps: list[Dependency], limit: int | None = None):
+        self.steps = 0
+        self.step_limit = MAX_SEARCH_STEPS if limit is None else limit
+        self.dead_ends: set[frozenset[tuple[str, ModVersion]]] = set()
+        self.failures: Counter[str] = Counter()
+        self.failure_reasons: dict[str, list[Constraint]] = {}
+        constraints: dict[str, list[Constraint]] = {}
+        pending: set[str] = set()
+        for dep in deps:
+            constraints.setdefault(dep.name, []).append(Constraint(dep, ""))
+            if is_required(dep):
+                pending.add(dep.name)
+        chosen = self._search_r({}, constraints, pending)
+        if chosen is None:
+            return None, constraints
+        # collect the constraints of the final assignment for optional mods
+        final: dict[str, list[Constraint]] = {}
+        for dep in deps:
+            final.setdefault(dep.name, []).append(Constraint(dep, ""))
+        for name, ver in chosen.items():
+            mod = self.by_name_version[name][ver]
+            for dep in (mod.dependencies or {}).values():
+                final.setdefault(dep.name, []).append(Constraint(dep, f"{name} {ver}"))
+        return chosen, final
+
+    def candidates(self, name: str, cons: list[Constraint]) -> list[ModVersion]:
+        if any(c.dep.type == DependencyType.CONFLICT for c in cons):
+            return []
+        versions = self.by_name_version.get(name)
+        if not versions:
+            return []
+        first, *rest = [c.dep for c in cons]
+        ret = [
+            ver
+            for ver in versions.matching(first)
+            if all(dep.meets(ver) for dep in rest)
+        ]
+        current = self.current.get(name)
+        if current in ret:
+            ret.remove(current)
+            ret.insert(0, current)
+        return ret
+
+    def _failed(self, name: str, cons: list[Constraint]):
+        self.failures[name] += 1
+        self.failure_reasons[name] = cons
+
+    def _search_r(
+        self,
+        chosen: dict[str, ModVersion],
+        constraints: dict[str, list[Constraint]],
+        pending: set[str],
+    ) -> dict[str, ModVersion] | None:
+        if not pending:
+            return chosen
+        self.steps += 1
+        if self.steps > self.step_limit:
+            raise SearchLimitReached()
+        key = frozenset(chosen.items())
+        if key in self.dead_ends:
+            return None
+        options = {name: self.candidates(name, constraints[name]) for name in pending}
+        name = min(options, key=lambda n: (len(options[n]), n))
+        if not options[name]:
+            self._failed(name, constraints[name])
+            self.dead_ends.add(key)
+            return None
+        for ver in options[name]:
+            mod = self.by_name_version[name][ver]
+            source = f"{name} {ver}"
+            new_constraints = constraints.copy()
+            new_pending = pending - {name}
+            ok = True
+            for dep in (mod.dependencies or {}).values():
+                dep_cons = new_constraints.get(dep.name, []) + [Constraint(dep, source)]
+                if dep.name in chosen and not dep.meets(chosen[dep.name]):
+                    # covers conflicts too, they can't be met by any version
+                    self._failed(dep.name, dep_cons)
+                    ok = False
+                    break
+                new_constraints[dep.name] = dep_cons
+                if is_required(dep) and dep.name not in chosen:
+                    new_pending.add(dep.name)
+            if not ok:
+                continue
+            new_chosen = chosen | {name: ver}
+            result = self._search_r(new_chosen, new_constraints, new_pending)
+            if result is not None:
+                return result
+        self.dead_ends.add(key)
+        return None
@@ -7,16 +7,27 @@ from urllib import parse, error
 from collections import defaultdict
 from typing import Iterator, Union, TypedDict, NamedTuple, NotRequired
 from enum import StrEnum
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+import threading
+from bisect import bisect_left, bisect_right, insort
 import traceback
+import stat
+import time
 
 import config
+import atomic_write
 from fa_paths import MODS, READ_DIR, FACTORIO_VERSION
 from fa_arg_parse import d_print
 from credentials import get_credentials
-from factorio_web import get_json, quote, download
+from factorio_web import get_json, quote, MAX_CONNECTIONS_PER_HOST
+from download_manager import DownloadManager
 
 _mod_portal = "https://mods.factorio.com"
 
+# threads used to read info.json from installed mods, 1 scans serially
+SCAN_WORKERS = 8
+
 dual_path = zPath | Path
 
 
@@ -91,15 +102,27 @@ class ModFile(TypedDict):
     mods: list[ModFileListing]
 
 
-class ModVersion(tuple):
+class ModVersion(int):
+    """major.minor.patch packed into one int, 16 bits each.
+    Orders and hashes like the version it represents without a tuple per version."""
+
+    __slots__ = ()
+
     def __new__(cls, version: str):
         ver = [0, 0, 0]
         for i, val in enumerate(version.split(".", 2)):
             ver[i] = int(val)
-        return super().__new__(cls, ver)
+            if not 0 <= ver[i] <= 0xFFFF:
+                raise ValueError(f"Mod version part out of range {version}")
+        return super().__new__(cls, ver[0] << 32 | ver[1] << 16 | ver[2])
+
+    def parts(self) -> tuple[int, int, int]:
+        return (self >> 32, self >> 16 & 0xFFFF, self & 0xFFFF)
 
     def __repr__(self) -> str:
-        return ".".join(str(n) for n in self)
+        return ".".join(str(n) for n in self.parts())
+
+    __str__ = __repr__
 
 
 MIN_MOD_VERSION = ModVersion("0")
@@ -115,16 +138,20 @@ class DependencyType(StrEnum):
     NORMAL = ""
 
     def __lt__(self, other):
-        return list(DependencyType).index(self) < list(DependencyType).index(other)
+        return _dep_type_order[self] < _dep_type_order[other]
 
     def __gt__(self, other):
-        return list(DependencyType).index(self) > list(DependencyType).index(other)
+        return _dep_type_order[self] > _dep_type_order[other]
 
     def __le__(self, other):
-        return list(DependencyType).index(self) <= list(DependencyType).index(other)
+        return _dep_type_order[self] <= _dep_type_order[other]
 
     def __ge__(self, other):
-        return list(DependencyType).index(self) >= list(DependencyType).index(other)
+        return _dep_type_order[self] >= _dep_type_order[other]
+
+
+# declaration order, looked up instead of searching list(DependencyType) every compare
+_dep_type_order = {t: i for i, t in enumerate(DependencyType)}
 
 
 class VerComp(NamedTuple):
@@ -135,11 +162,16 @@ class VerComp(NamedTuple):
         return f'{"=" if self.epsilon == 0 else ""} {self.ver}'
 
 
+# distinct dependency strings remembered by Dependency.from_str
+DEPENDENCY_CACHE_SIZE = 8192
+
+
 class IncompatibleDependencies(ValueError):
     pass
 
 
 class Dependency(object):
+    __slots__ = ("type", "name", "min", "max")
     __types = "|".join([re.escape(t) for t in DependencyType])
     __re_raw = rf"({__types})\s*([-\w ]+?)(?:\s*([><=]+)\s*(\d+\.\d+(?:\.\d+)?))?"
     __re = re.compile(__re_raw)
@@ -153,8 +185,15 @@ class Dependency(object):
         self.max = max_ver
 
     @classmethod
-    def from_str(cls, dep: str):
-        m = cls.__re.fullmatch(dep)
+    def from_str(cls, dep: str) -> "Dependency":
+        """Parse a dependency string from an info.json.
+        Results are cached and shared, so don't modify them."""
+        return cls._parse(dep)
+
+    @staticmethod
+    @lru_cache(maxsize=DEPENDENCY_CACHE_SIZE)
+    def _parse(dep: str) -> "Dependency":
+        m = Dependency.__re.fullmatch(dep)
         if not m:
             raise ValueError(f"Unmatched mod dependency {dep}")
         name = m[2]
@@ -182,15 +221,34 @@ class Dependency(object):
                     min = VerComp(ver, 0)
                 case "=":
                     min = max = VerComp(ver, 0)
-        return cls(type, name, min, max)
+        return Dependency(type, name, min, max)
 
     def meets(self, other: ModVersion):
         # works because of how we set up min and max as tuples
         return self.min <= (other, 0) <= self.max
 
+    def version_range(self, versions: list[ModVersion]) -> range:
+        """The indexes of the sorted versions that meet this dependency."""
+        # epsilon decides if a version equal to the bound is in or out
+        find_min = bisect_right if self.min.epsilon > 0 else bisect_left
+        find_max = bisect_left if self.max.epsilon < 0 else bisect_right
+        return range(find_min(versions, self.min.ver), find_max(versions, self.max.ver))
+
     def __lt__(self, other):
-        order = list(DependencyType)
-        return order.index(self.type) < order.index(other.type)
+        return _dep_type_order[self.type] < _dep_type_order[other.type]
+
+    def __eq__(self, other):
+        if not isinstance(other, Dependency):
+            return NotImplemented
+        return (
+            self.name == other.name
+            and self.type == other.type
+            and self.min == other.min
+            and self.max == other.max
+        )
+
+    def __hash__(self):
+        return hash((self.name, self.type, self.min, self.max))
 
     def __add__(self, other):
         if not other:
@@ -255,6 +313,8 @@ class Dependencies(dict[str, Dependency]):
     def __iadd__(self, deps):
         if isinstance(deps, Dependency):
             if deps.name in self:
+                if self[deps.name] == deps:
+                    return self
                 self[deps.name] += deps
             else:
                 self[deps.name] = deps
@@ -268,33 +328,111 @@ class Dependencies(dict[str, Dependency]):
 
 
 class Mod(object):
-    info: ModInfoJson
+    __slots__ = ("name", "version", "factorio_version", "dependencies")
 
     def __init__(self, info: ModInfoJson) -> None:
-        self.info = info
         if "dependencies" in info:
             self.dependencies = Dependencies(info["dependencies"])
         else:
             self.dependencies = None
         self.version = ModVersion(info["version"])
         self.name = info["name"]
+        self.factorio_version = info.get("factorio_version")
+
+
+class ModIndex(object):
+    """Persistent cache of installed mods' info.json keyed by path, size and mtime.
+    Lets a warm start skip opening every mod zip just to read its info.json."""
+
+    version = 1
+
+    def __init__(self, file: Path) -> None:
+        self.file = file
+        self.hits = 0
+        self.misses = 0
+        self.modified = False
+        self.seen: set[str] = set()
+        self.lock = threading.Lock()
+        try:
+            with open(file, encoding="utf8") as fp:
+                data = json.load(fp)
+        except (FileNotFoundError, json.JSONDecodeError):
+            data = {}
+        if data.get("version") != self.version:
+            data = {}
+            self.modified = True
+        self.entries: dict[str, dict] = data.get("mods", {})
+
+    @staticmethod
+    def stat_key(path: Path) -> list[int]:
+        st = path.stat()
+        if stat.S_ISDIR(st.st_mode):
+            st = (path / "info.json").stat()
+        return [st.st_size, st.st_mtime_ns]
+
+    def lookup(self, path: Path, key: list[int]) -> dict | None:
+        name = str(path)
+        with self.lock:
+            self.seen.add(name)
+            entry = self.entries.get(name)
+            if entry and entry["key"] == key:
+                self.hits += 1
+                return entry
+            self.misses += 1
+        return None
+
+    def store(
+        self, path: Path, key: list[int], info: ModInfoJson | None, folder: str
+    ) -> None:
+        with self.lock:
+            self.entries[str(path)] = {"key": key, "info": info, "folder": folder}
+            self.modified = True
+
+    def save(self) -> None:
+        stale = self.entries.keys() - self.seen
+        for name in stale:
+            del self.entries[name]
+        if not self.modified and not stale:
+            return
+        try:
+            data = {"version": self.version, "mods": self.entries}
+            atomic_write.replace_file(self.file, json.dumps(data))
+        except OSError as e:
+            d_print(f"Unable to save mod index {self.file}: {e}")
+        self.modified = False
 
 
 class InstalledMod(Mod):
+    __slots__ = ("info", "path", "_folder", "_folder_path")
     dependencies: Dependencies
+    info: ModInfoJson
 
-    def __init__(self, path: dual_path) -> None:
-        if path.is_file():
-            if not is_zipfile(str(path)):
+    def __init__(self, path: dual_path, index: ModIndex | None = None) -> None:
+        self.path = path
+        entry = None
+        if index and isinstance(path, Path):
+            try:
+                key = index.stat_key(path)
+            except FileNotFoundError:
                 raise NotAModPath(path)
-            self.folder_path = next(zPath(str(path)).iterdir())
+            entry = index.lookup(path, key)
+            if not entry:
+                try:
+                    info, folder = self._read_info(path)
+                except NotAModPath:
+                    index.store(path, key, None, "")
+                    raise
+                entry = {"info": info, "folder": folder}
+                index.store(path, key, info, folder)
+        if entry is None:
+            info, folder = self._read_info(path)
+        elif entry["info"] is None:
+            raise NotAModPath(path)
         else:
-            self.folder_path = path
-        info_path = self.folder_path.joinpath("info.json")
-        if not info_path.is_file():
-            raise NotAModPath(self.folder_path)
-        with info_path.open(encoding="utf8") as fp:
-            i: ModInfoJson = json.load(fp)
+            info, folder = entry["info"], entry["folder"]
+        self._folder = folder
+        # copy so the adjustments below don't leak into the index
+        i: ModInfoJson = dict(info)  # type: ignore
         if path.name == "core":
             i["version"] = FACTORIO_VERSION()
         if path.parent == READ_DIR():
@@ -309,8 +447,37 @@ class InstalledMod(Mod):
             )
         if "dependencies" not in i:
             i["dependencies"] = ["base"]
+        self.info = i
         super().__init__(i)
 
+    @staticmethod
+    def _read_info(path: dual_path) -> tuple[ModInfoJson, str]:
+        """Read info.json from a mod folder or zip.
+        Returns the parsed json and the name of the folder inside the zip."""
+        folder = ""
+        if path.is_file():
+            if not is_zipfile(str(path)):
+                raise NotAModPath(path)
+            folder_path = next(zPath(str(path)).iterdir())
+            folder = folder_path.name
+        else:
+            folder_path = path
+        info_path = folder_path.joinpath("info.json")
+        if not info_path.is_file():
+            raise NotAModPath(folder_path)
+        with info_path.open(encoding="utf8") as fp:
+            return json.load(fp), folder
+
+    @property
+    def folder_path(self) -> dual_path:
+        if not self._folder:
+            return self.path
+        try:
+            return self._folder_path
+        except AttributeError:
+            self._folder_path = zPath(str(self.path), self._folder + "/")
+            return self._folder_path
+
     @staticmethod
     def _iter_files_sub(parts: list[str | re.Pattern], path: dual_path):
         if not path.exists():
@@ -333,19 +500,57 @@ class InstalledMod(Mod):
         yield from self._iter_files_sub(parts, self.folder_path)
 
 
+@lru_cache(maxsize=DEPENDENCY_CACHE_SIZE)
+def _shared_dependencies(deps: tuple[str, ...]) -> Dependencies:
+    # most releases of a mod list the same dependencies, so they share one copy
+    return Dependencies(deps)
+
+
 class PortalMod(Mod):
+    """A release from the mod portal.
+    Releases listing the same dependencies share them, so don't modify them."""
+
+    __slots__ = ("release",)
+
     def __init__(self, release: Release, name) -> None:
-        info: ModInfoJson = {
-            "factorio_version": release["info_json"]["factorio_version"],
-            "name": name,
-            "version": release["version"],
-        }
-        if "dependencies" in release["info_json"]:
-            info["dependencies"] = release["info_json"]["dependencies"]
-        super().__init__(info)
+        info_json = release["info_json"]
+        self.name = name
+        self.version = ModVersion(release["version"])
+        self.factorio_version = info_json["factorio_version"]
+        if "dependencies" in info_json:
+            self.dependencies = _shared_dependencies(tuple(info_json["dependencies"]))
+        else:
+            self.dependencies = None
         self.release = release
 
 
+class ModVersions(dict[ModVersion, Mod]):
+    """The known releases of one mod by version.
+    A sorted list of the versions is maintained alongside for range lookups,
+    so only assign with [] rather than update() or setdefault()."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.sorted: list[ModVersion] = []
+
+    def __setitem__(self, ver: ModVersion, mod: Mod) -> None:
+        if ver not in self:
+            insort(self.sorted, ver)
+        super().__setitem__(ver, mod)
+
+    def __delitem__(self, ver: ModVersion) -> None:
+        super().__delitem__(ver)
+        self.sorted.remove(ver)
+
+    def newest_first(self) -> Iterator[ModVersion]:
+        return reversed(self.sorted)
+
+    def matching(self, dep: Dependency) -> Iterator[ModVersion]:
+        """Versions that meet the dependency, newest first."""
+        for i in reversed(dep.version_range(self.sorted)):
+            yield self.sorted[i]
+
+
 class DepCheckResult(StrEnum):
     OK = "OK"
     ENABLE = "ENABLE"
@@ -360,7 +565,7 @@ DepCheckResults = dict[DepCheckResult, set[Dependency]]
 class ModManager(object):
     _re_factorio_ver = re.compile(r"\d+\.\d+")
 
-    def __init__(self) -> None:
+    def __init__(self, scan_workers: int | None = None) -> None:
         global factorio_version
         factorio_version = self._re_factorio_ver.search(FACTORIO_VERSION())[0]
         self.mod_list_file = MODS() / "mod-list.json"
@@ -373,16 +578,32 @@ class ModManager(object):
             data = {"mods": []}
         self.dict = {m["name"]: m for m in data["mods"]}
         self.modified = False
-        self.by_name_version: defaultdict[str, dict[ModVersion, Mod]] = defaultdict(
-            dict
-        )
-        for mod_path in self._iterate_over_all_mod_paths():
+        self.by_name_version: defaultdict[str, ModVersions] = defaultdict(ModVersions)
+        start = time.perf_counter()
+        self.index = index = ModIndex(MODS() / "mod-index.json")
+        if scan_workers is None:
+            scan_workers = SCAN_WORKERS
+        mod_paths = list(self._iterate_over_all_mod_paths())
+        load = lambda path: self._try_load_installed_mod(path, index)
+        if scan_workers > 1 and len(mod_paths) > 1:
+            # opening zips is I/O bound so threads help, but registering is done
+            # here in path order so the result matches a serial scan exactly
+            with ThreadPoolExecutor(scan_workers, "mod-scan") as pool:
+                loaded = list(pool.map(load, mod_paths))
+        else:
+            loaded = map(load, mod_paths)
+        for m in loaded:
+            if m is None:
+                continue
             try:
-                self.add_installed_mod(mod_path)
-            except NotAModPath:
-                pass
+                self._register_installed_mod(m)
             except FactorioVersionMismatch:
                 pass
+        index.save()
+        d_print(
+            f"Scanned mods in {time.perf_counter() - start:.3f}s"
+            f" ({index.hits} from index, {index.misses} read)"
+        )
 
         pre_size = len(self.dict)
         self.dict = {
@@ -394,8 +615,9 @@ class ModManager(object):
     def exit(self) -> None:
         if self.modified:
             data = {"mods": [m for m in self.dict.values()]}
-            with open(self.mod_list_file, "w", encoding="utf8") as fp:
-                json.dump(data, fp, ensure_ascii=False, indent=2)
+            text = json.dumps(data, ensure_ascii=False, indent=2)
+            atomic_write.replace_file(self.mod_list_file, text)
+            self.modified = False
 
     def enabled(self) -> list[str]:
         return [name for name, m in self.dict.items() if m["enabled"]]
@@ -421,7 +643,7 @@ class ModManager(object):
         if "version" in current:
             return ModVersion(current["version"])
         versions = self.by_name_version[name]
-        for ver in sorted(versions, reverse=True):
+        for ver in versions.newest_first():
             if isinstance(versions[ver], InstalledMod):
                 return ver
         raise ModNotInstalled(name)
@@ -441,9 +663,7 @@ class ModManager(object):
         if dep.name not in self.by_name_version:
             return None
         vers = self.by_name_version[dep.name]
-        for ver in sorted(vers, reverse=True):
-            if not dep.meets(ver):
-                continue
+        for ver in vers.matching(dep):
             mod = vers[ver]
             if installed_only and not isinstance(mod, InstalledMod):
                 continue
@@ -499,8 +719,7 @@ class ModManager(object):
             self.disable(dep.name)
         for dep in res[DepCheckResult.VERSION_SWITCH]:
             self.select_version(dep.name, dep.min.ver)
-        for dep in res[DepCheckResult.INSTALL]:
-            self.install_mod(dep)
+        self.install_mods(res[DepCheckResult.INSTALL])
 
     def install_mod(self, dep: Dependency):
         mod = self.find_dep(dep)
@@ -514,16 +733,49 @@ class ModManager(object):
         assert isinstance(mod, PortalMod)
         return self.download_mod(mod.release)
 
+    def install_mods(self, deps: Iterable[Dependency]):
+        """Install several mods, downloading them in parallel."""
+        deps = list(deps)
+        missing = [dep.name for dep in deps if not self.find_dep(dep)]
+        if missing:
+            self.add_info_for_mods(missing)
+        releases: list[Release] = []
+        for dep in deps:
+            mod = self.find_dep(dep)
+            if isinstance(mod, InstalledMod):
+                continue
+            if not mod:
+                raise UnresolvedModDependency(dep)
+            assert isinstance(mod, PortalMod)
+            releases.append(mod.release)
+        return self.download_mods(releases)
+
     def download_mod(self, release: Release):
+        return self.download_mods([release])[0]
+
+    def download_mods(self, releases: list[Release]):
+        if not releases:
+            return []
         cred = get_credentials()
-        url = _mod_portal + release["download_url"] + "?" + parse.urlencode(cred)
-        new_path = MODS() / release["file_name"]
-        download(url, new_path)
-        return self.add_installed_mod(new_path)
-
-    def add_installed_mod(self, mod_path: dual_path):
-        m = InstalledMod(mod_path)
-        if m.info.get("factorio_version") != factorio_version:
+        with DownloadManager() as manager:
+            for release in releases:
+                url = _mod_portal + release["download_url"]
+                new_path = MODS() / release["file_name"]
+                manager.add(url, new_path, cred, sha1=release["sha1"])
+        return [self.add_installed_mod(MODS() / r["file_name"]) for r in releases]
+
+    def add_installed_mod(self, mod_path: dual_path, index: ModIndex | None = None):
+        return self._register_installed_mod(InstalledMod(mod_path, index))
+
+    @staticmethod
+    def _try_load_installed_mod(mod_path: Path, index: ModIndex):
+        try:
+            return InstalledMod(mod_path, index)
+        except NotAModPath:
+            return None
+
+    def _register_installed_mod(self, m: InstalledMod):
+        if m.factorio_version != factorio_version:
             raise FactorioVersionMismatch(m)
         self.by_name_version[m.name][m.version] = m  # TODO: check duplicates?
         if m.name not in self.dict and m.name != "core":
@@ -531,11 +783,12 @@ class ModManager(object):
             self.modified = True
         return m
 
+    @staticmethod
+    def get_dep_info_for_mod(mod_name: str) -> PortalResult:
+        return get_json(f"{_mod_portal}/api/mods/{quote(mod_name)}/full")
+
     def add_dep_info_for_mod(self, mod_name: str):
-        all_data: PortalResult = get_json(
-            f"{_mod_portal}/api/mods/{quote(mod_name)}/full"
-        )
-        self.add_info_for_mod(all_data)
+        self.add_info_for_mod(self.get_dep_info_for_mod(mod_name))
 
     def add_info_for_mods(self, mod_names: Iterable[str]):
         args = {
@@ -546,11 +799,19 @@ class ModManager(object):
             self.add_info_for_mod(r)
 
     def add_dep_info_for_mods(self, mod_names: Iterable[str]):
-        for name in mod_names:
-            self.add_dep_info_for_mod(name)
+        names = list(mod_names)
+        if len(names) <= 1:
+            for name in names:
+                self.add_dep_info_for_mod(name)
+            return
+        # fetch in parallel but add the results here in order,
+        # so the mod info itself is only ever touched from this thread
+        with ThreadPoolExecutor(MAX_CONNECTIONS_PER_HOST, "mod-portal") as pool:
+            for result in pool.map(self.get_dep_info_for_mod, names):
+                self.add_info_for_mod(result)
 
     def add_info_for_mod(self, result: PortalResult):
-        for release in result["releases"]:
+        for release in result.get("releases", []):
             if release["info_json"].get("factorio_version") == factorio_version:
                 self.add_info_for_release(release, result["name"])
 
@@ -561,51 +822,58 @@ class ModManager(object):
             return
         self.by_name_version[m.name][m.version] = m
 
+    def fetch_dependency_info(self, deps: Iterable[Dependency]):
+        """Load full portal info, dependencies included, for every mod these could require.
+        Each round of newly found names is fetched in parallel."""
+        looked_up: set[str] = set()
+        names = {dep.name for dep in deps if dep.type > DependencyType.OPTIONAL}
+        while names:
+            fetch = []
+            for name in names:
+                versions = self.by_name_version.get(name)
+                if not versions or any(
+                    m.dependencies is None for m in versions.values()
+                ):
+                    fetch.append(name)
+            self.add_dep_info_for_mods(fetch)
+            looked_up |= names
+            required = set()
+            for name in names:
+                for mod in self.by_name_version.get(name, {}).values():
+                    for dep in (mod.dependencies or {}).values():
+                        if dep.type > DependencyType.OPTIONAL:
+                            required.add(dep.name)
+            names = required - looked_up
+
     def expand_dependencies(self, deps: Iterable[Dependency]):
-        collected: set[Dependency] = set()
-        progress = True
-        connection_issues = False
-        looked_up = set()
-        while deps:
-            expanding = set(deps)
-            deps = set()
-            while expanding:
-                dep = expanding.pop()
-                if not dep.type <= DependencyType.OPTIONAL:
-                    # since this is not optional dependency, we need to expand it
-                    m = self.find_dep(dep)
-                    if not m or m.dependencies is None:
-                        if dep in looked_up:
-                            raise UnresolvedModDependency(dep)
-                        deps.add(dep)
-                        # we'll try to resolve this later after downloading the mod
-                        continue
-                    new_deps = set(m.dependencies.values())
-                    new_deps -= collected
-                    new_deps -= deps
-                    expanding |= new_deps
-                collected.add(dep)
-            if not deps:
-                break
-            self.add_dep_info_for_mods(set((d.name for d in deps)))
-            looked_up |= deps
-
-        return Dependencies(collected)
+        """Resolve the dependencies and everything they require into exact versions.
+        Mods whose current version fits keep it, and come back with their range.
+        Raises mod_solver.UnsolvableDependencies explaining why if it's impossible."""
+        from mod_solver import ModSolver
+
+        deps = list(deps)
+        self.fetch_dependency_info(deps)
+        current = {}
+        for name in self.dict:
+            try:
+                current[name] = self.get_version(name)
+            except ModNotInstalled:
+                pass
+        return ModSolver(self.by_name_version, current).solve(deps)
 
     def get_updatable(self, require_enabled=True):
         """Check for updates to installed mods.
         Returns a set of dependencies listing latest updates available."""
         check = []
         for mod in self.iter_installed_mods(require_enabled=require_enabled):
-            if mod.folder_path.parent == READ_DIR():  # don't check built in
+            if mod.path.parent == READ_DIR():  # don't check built in
                 continue
             check.append(mod.name)
         self.add_info_for_mods(check)
         deps: set[Dependency] = set()
         for mod in self.iter_installed_mods(require_enabled=require_enabled):
             current_ver = mod.version
-            versions = self.by_name_version[mod.name]
-            ver = max(versions)
+            ver = self.by_name_version[mod.name].sorted[-1]
             if ver > current_ver:
                 v = VerComp(ver, 0)
                 deps.add(Dependency(DependencyType.NORMAL, mod.name, v, v))
@@ -660,22 +928,49 @@ class ModManager(object):
 
 
 class __mod_manger_factory(object):
+    """Hands out one long lived ModManager shared by every `with mods as ...` block.
+    The scanned mods and any portal info stay in memory between blocks.
+    The manager is only rebuilt when mod-list.json or the mods folder changes on disk,
+    and mod-list.json is only written when the outermost block exits with changes."""
+
     def __init__(self) -> None:
         self.mod_manager: ModManager | None = None
+        self.depth = 0
+        self.signature: list[tuple[int, int] | None] = []
+
+    @staticmethod
+    def _signature():
+        sig: list[tuple[int, int] | None] = []
+        for path in [MODS() / "mod-list.json", MODS()]:
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                sig.append(None)
+            else:
+                sig.append((st.st_size, st.st_mtime_ns))
+        return sig
+
+    def invalidate(self) -> None:
+        """Force a rescan on the next `with mods`"""
+        self.signature = []
 
     def __enter__(self) -> ModManager:
-        assert (
-            self.mod_manager is None
-        ), "Asking for a second mod manager before the first one is closed"
-        self.mod_manager = ModManager()
+        if self.depth == 0:
+            if self.mod_manager is None or self._signature() != self.signature:
+                self.mod_manager = ModManager()
+        assert self.mod_manager is not None
+        self.depth += 1
         return self.mod_manager
 
     def __exit__(self, *args) -> None:
-        assert isinstance(
-            self.mod_manager, ModManager
+        assert (
+            self.depth > 0 and self.mod_manager is not None
         ), "Exiting mod manager without entering it first"
-        self.mod_manager.exit()
-        self.mod_manager = None
+        self.depth -= 1
+        if self.depth == 0:
+            self.mod_manager.exit()
+            # our own writes shouldn't trigger a rescan
+            self.signature = self._signature()
 
 
 mods = __mod_manger_factory()
@@ -3,6 +3,7 @@ from enum import StrEnum
 import json
 
 from fa_paths import PLAYER_DATA
+import atomic_write
 
 
 class NoPlayerData(FileNotFoundError):
@@ -116,7 +117,7 @@ PlayerData = TypedDict(
 
 def get_player_data():
     try:
-        with PLAYER_DATA().open(encoding="utf8") as fp:
+        with atomic_write.open_saved(PLAYER_DATA()) as fp:
             data: PlayerData = json.load(fp)
     except FileNotFoundError:
         raise NoPlayerData("Player data file not found.")
@@ -125,7 +126,6 @@ def get_player_data():
 
 def save_player_data(data: PlayerData):
     try:
-        with PLAYER_DATA().open("w", encoding="utf8") as fp:
-            json.dump(data, fp, indent=2)
+        atomic_write.save(PLAYER_DATA(), json.dumps(data, indent=2))
     except FileNotFoundError:
         raise NoPlayerData("Player data file not found.")
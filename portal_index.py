@@ -0,0 +1,196 @@
+import sqlite3
+import time
+from pathlib import Path
+from typing import NamedTuple
+
+from fa_arg_parse import d_print
+from factorio_web import get_json
+
+MODS_API = "https://mods.factorio.com/api/mods"
+# refresh the local copy before searching if it's older than this many seconds
+MAX_AGE = 24 * 60 * 60
+# results per page when fetching only what changed
+DELTA_PAGE_SIZE = 100
+
+upsert_mod = "INSERT OR REPLACE INTO mods VALUES (?,?,?,?,?,?,?,?)"
+
+
+class PortalSearchResult(NamedTuple):
+    name: str
+    title: str
+    summary: str
+    owner: str
+    latest_version: str
+    factorio_version: str
+    downloads_count: int
+
+
+class PortalIndex(object):
+    """Local SQLite copy of the mod portal's mod list for instant searching.
+    The first refresh downloads the whole list,
+    later ones only fetch mods released since the newest released_at seen."""
+
+    def __init__(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(path)
+        self.db.execute("""CREATE TABLE IF NOT EXISTS mods (
+                name TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                summary TEXT NOT NULL,
+                owner TEXT NOT NULL,
+                latest_version TEXT NOT NULL,
+                factorio_version TEXT NOT NULL,
+                downloads_count INTEGER NOT NULL,
+                released_at TEXT NOT NULL
+            )""")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+        )
+        row = self.db.execute(
+            "SELECT sql FROM sqlite_master WHERE name='mods_fts'"
+        ).fetchone()
+        if row and "content=" not in row[0]:
+            # older indexes kept their own copy of the text
+            self.db.execute("DROP TABLE mods_fts")
+            row = None
+        try:
+            # the text lives in mods, the search index refers to its rows by rowid
+            self.db.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS mods_fts USING fts5("
+                "name, title, summary, content='mods', content_rowid='rowid')"
+            )
+            self.fts = True
+        except sqlite3.OperationalError:
+            # sqlite built without fts5, fall back to LIKE searches
+            self.fts = False
+        if self.fts and not row:
+            self.db.execute("INSERT INTO mods_fts(mods_fts) VALUES ('rebuild')")
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
+
+    def get_meta(self, key: str) -> str | None:
+        row = self.db.execute("SELECT value FROM meta WHERE key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        self.db.execute("INSERT OR REPLACE INTO meta VALUES (?, ?)", (key, value))
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM mods").fetchone()[0]
+
+    def age(self) -> float:
+        refreshed = self.get_meta("refreshed")
+        return time.time() - float(refreshed) if refreshed else float("inf")
+
+    def _store(self, results: list[dict], full=False) -> str:
+        """Upsert portal list results, returning the newest released_at among them.
+        With full the tables were just emptied, so search is rebuilt once at the end."""
+        newest = ""
+        for r in results:
+            latest = r.get("latest_release") or {}
+            released_at = latest.get("released_at", "")
+            newest = max(newest, released_at)
+            row = (
+                r["name"],
+                r.get("title", ""),
+                r.get("summary", ""),
+                r.get("owner", ""),
+                latest.get("version", ""),
+                latest.get("info_json", {}).get("factorio_version", ""),
+                r.get("downloads_count", 0),
+                released_at,
+            )
+            if full or not self.fts:
+                self.db.execute(upsert_mod, row)
+                continue
+            old = self.db.execute(
+                "SELECT rowid, name, title, summary FROM mods WHERE name=?", row[:1]
+            ).fetchone()
+            if old:
+                self.db.execute(
+                    "INSERT INTO mods_fts(mods_fts, rowid, name, title, summary)"
+                    " VALUES ('delete', ?, ?, ?, ?)",
+                    old,
+                )
+            self.db.execute(upsert_mod, row)
+            self.db.execute(
+                "INSERT INTO mods_fts(rowid, name, title, summary)"
+                " SELECT rowid, name, title, summary FROM mods WHERE name=?",
+                row[:1],
+            )
+        if full and self.fts:
+            self.db.execute("INSERT INTO mods_fts(mods_fts) VALUES ('rebuild')")
+        return newest
+
+    def refresh(self, full=False):
+        watermark = self.get_meta("released_at")
+        start = time.perf_counter()
+        if full or not watermark:
+            params = {"page_size": "max"}
+            data = get_json(MODS_API, params, cache=False)
+            self.db.execute("DELETE FROM mods")
+            if self.fts:
+                self.db.execute("INSERT INTO mods_fts(mods_fts) VALUES ('delete-all')")
+            newest = self._store(data["results"], full=True)
+            count = len(data["results"])
+        else:
+            newest = watermark
+            count = 0
+            page = 1
+            while True:
+                params = {
+                    "sort": "updated_at",
+                    "sort_order": "desc",
+                    "page_size": DELTA_PAGE_SIZE,
+                    "page": page,
+                }
+                data = get_json(MODS_API, params, cache=False)
+                results = data["results"]
+                changed = [
+                    r
+                    for r in results
+                    if (r.get("latest_release") or {}).get("released_at", "")
+                    > watermark
+                ]
+                newest = max(newest, self._store(changed))
+                count += len(changed)
+                if not changed or page >= data["pagination"]["page_count"]:
+                    break
+                page += 1
+        self.set_meta("released_at", newest)
+        self.set_meta("refreshed", str(time.time()))
+        self.db.commit()
+        d_print(
+            f"Portal index updated {count} mods in {time.perf_counter() - start:.2f}s"
+        )
+
+    def search(
+        self, query: str, factorio_version: str | None = None, limit=20
+    ) -> list[PortalSearchResult]:
+        """Search names, titles and summaries for all the words in query."""
+        words = query.split()
+        if not words:
+            return []
+        columns = ", ".join(f"mods.{f}" for f in PortalSearchResult._fields)
+        params: list = []
+        if self.fts:
+            match = " ".join('"' + w.replace('"', '""') + '"*' for w in words)
+            sql = f"SELECT {columns} FROM mods_fts"
+            sql += " JOIN mods ON mods.rowid = mods_fts.rowid"
+            sql += " WHERE mods_fts MATCH ?"
+            params.append(match)
+            order = "bm25(mods_fts), mods.downloads_count DESC"
+        else:
+            sql = f"SELECT {columns} FROM mods WHERE 1"
+            for w in words:
+                sql += " AND (name LIKE ? OR title LIKE ? OR summary LIKE ?)"
+                params += [f"%{w}%"] * 3
+            order = "mods.downloads_count DESC"
+        if factorio_version:
+            sql += " AND mods.factorio_version = ?"
+            params.append(factorio_version)
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+        return [PortalSearchResult(*row) for row in self.db.execute(sql, params)]
@@ -0,0 +1,146 @@
+from datetime import datetime
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+import gzip
+import json
+import re
+import time
+
+from command_queue import CommandWorker
+
+# a chunk of lines is compressed and indexed together once it reaches this size or age
+CHUNK_BYTES = 64 * 1024
+CHUNK_SECONDS = 10
+# start another file for the same session past this many compressed bytes
+MAX_FILE_BYTES = 16 * 1024 * 1024
+# all files of the oldest sessions are deleted past this many sessions
+MAX_SESSIONS = 30
+
+# factorio's "----- Error -----" banner and its timestamped "Error" log lines
+_error_line = re.compile(rb"^-+ Error -+\r?$|^ *\d+\.\d{3} Error ", re.M)
+
+# compressing and writing happen here rather than on the stdout reader
+_writer = CommandWorker("session-log", lambda write: write())
+
+
+class SessionLog(object):
+    """Writes all of one game session's output to gzip files under folder.
+    Each chunk of lines is its own gzip member. A .idx file next to the log lists
+    every chunk's start time, offset, first line number and error count,
+    so searches only decompress the chunks that could match."""
+
+    def __init__(self, folder: Path) -> None:
+        folder.mkdir(parents=True, exist_ok=True)
+        self.folder = folder
+        self.name = "session-" + datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
+        self.part = 0
+        self.path: Path | None = None
+        self.buffer: list[bytes] = []
+        self.buffered = 0
+        self.chunk_time = 0.0
+        self.lines = 0
+
+    def write(self, line: bytes):
+        if not self.buffer:
+            self.chunk_time = time.time()
+        self.buffer.append(line)
+        self.buffered += len(line)
+        age = time.time() - self.chunk_time
+        if self.buffered >= CHUNK_BYTES or age > CHUNK_SECONDS:
+            self.flush()
+
+    def flush(self):
+        if not self.buffer:
+            return
+        data = b"".join(self.buffer)
+        chunk_time, first_line = self.chunk_time, self.lines
+        self.lines += len(self.buffer)
+        self.buffer = []
+        self.buffered = 0
+        _writer.submit(lambda: self._write_chunk(data, chunk_time, first_line))
+
+    def _write_chunk(self, data: bytes, chunk_time: float, first_line: int):
+        if not self.path or self.path.stat().st_size > MAX_FILE_BYTES:
+            self.part += 1
+            self.path = self.folder / f"{self.name}_{self.part:02}.log.gz"
+            self.path.touch()
+            rotate(self.folder)
+        offset = self.path.stat().st_size
+        errors = len(_error_line.findall(data))
+        with open(self.path, "ab") as fp:
+            fp.write(gzip.compress(data, mtime=int(chunk_time)))
+        with open(self.path.with_suffix(".idx"), "a", encoding="utf8") as fp:
+            fp.write(json.dumps([chunk_time, offset, first_line, errors]) + "\n")
+
+    def close(self):
+        self.flush()
+        _writer.wait()
+
+    def tee(self, stdout: Iterable[bytes]) -> Iterator[bytes]:
+        """Pass stdout lines through while logging them, closing the log when they end."""
+        try:
+            for line in stdout:
+                self.write(line)
+                yield line
+        finally:
+            self.close()
+
+
+def log_files(folder: Path) -> list[Path]:
+    """Session log files, newest first."""
+    return sorted(folder.glob("session-*.log.gz"), reverse=True)
+
+
+def rotate(folder: Path):
+    sessions = set()
+    for path in log_files(folder):
+        # a session's parts sort next to each other, named {session}_{part}.log.gz
+        sessions.add(path.name.rsplit("_", 1)[0])
+        if len(sessions) <= MAX_SESSIONS:
+            continue
+        path.unlink(missing_ok=True)
+        path.with_suffix(".idx").unlink(missing_ok=True)
+
+
+class SearchHit(NamedTuple):
+    file: str
+    time: float  # when the chunk holding the line started
+    line_number: int
+    line: str
+
+
+def _chunks(path: Path) -> Iterator[tuple[float, int, int, int, int]]:
+    """The index entries of a log, each with the offset where the next chunk starts."""
+    try:
+        with open(path.with_suffix(".idx"), encoding="utf8") as fp:
+            entries = [json.loads(line) for line in fp if line.strip()]
+    except (FileNotFoundError, json.JSONDecodeError):
+        return
+    ends = [entry[1] for entry in entries[1:]] + [path.stat().st_size]
+    for (chunk_time, offset, first_line, errors), end in zip(entries, ends):
+        yield chunk_time, offset, end, first_line, errors
+
+
+def search(
+    folder: Path, text: str = "", errors_only=False, limit=50
+) -> list[SearchHit]:
+    """Newest sessions first, lines containing text, case insensitive.
+    With errors_only just the error lines, and only chunks with errors are read."""
+    needle = text.lower()
+    hits: list[SearchHit] = []
+    for path in log_files(folder):
+        with open(path, "rb") as fp:
+            for chunk_time, offset, end, first_line, errors in _chunks(path):
+                if errors_only and not errors:
+                    continue
+                fp.seek(offset)
+                data = gzip.decompress(fp.read(end - offset))
+                for n, b_line in enumerate(data.splitlines(), first_line + 1):
+                    if errors_only and not _error_line.match(b_line):
+                        continue
+                    line = b_line.decode("utf8", "replace")
+                    if needle in line.lower():
+                        hits.append(SearchHit(path.name, chunk_time, n, line))
+                        if len(hits) >= limit:
+                            return hits
+    return hits
@@ -0,0 +1,33 @@
+from datetime import datetime
+
+from fa_paths import SESSION_LOGS
+from translations import translate, t_print
+from session_log import SearchHit, search
+
+
+def _show(hits: list[SearchHit]):
+    if not hits:
+        t_print(("fa-l.session-log-no-results",))
+        return
+    for hit in hits:
+        when = datetime.fromtimestamp(hit.time).strftime("%Y-%m-%d %H:%M")
+        print(f"{when} line {hit.line_number}: {hit.line}")
+
+
+def search_text(*args):
+    text = input(translate(("fa-l.session-log-search-prompt",)))
+    if text:
+        _show(search(SESSION_LOGS(), text))
+    return 0
+
+
+def find_errors(*args):
+    text = input(translate(("fa-l.session-log-errors-prompt",)))
+    _show(search(SESSION_LOGS(), text, errors_only=True))
+    return 0
+
+
+session_log_menu = {
+    ("fa-l.session-log-search",): search_text,
+    ("fa-l.session-log-errors",): find_errors,
+}
@@ -0,0 +1,112 @@
+"""Record factorio's stdout with timing and replay it into the monitor without the game.
+
+Replay a recording with: python -m stdout_recording FILE [--realtime]"""
+
+from collections import Counter
+from pathlib import Path
+from typing import BinaryIO, Iterable, Iterator
+import struct
+import sys
+import time
+
+MAGIC = b"FA stdout recording 1\n"
+# seconds since the recording started, then the length of the line that follows
+FRAME = struct.Struct("<dI")
+
+
+class NotARecording(ValueError):
+    pass
+
+
+def record(stdout: Iterable[bytes], path: Path) -> Iterator[bytes]:
+    """Pass stdout lines through while writing them to path with the time each was read."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "wb") as fp:
+        fp.write(MAGIC)
+        start = time.perf_counter()
+        for line in stdout:
+            fp.write(FRAME.pack(time.perf_counter() - start, len(line)))
+            fp.write(line)
+            yield line
+
+
+def read_frames(fp: BinaryIO) -> Iterator[tuple[float, bytes]]:
+    if fp.read(len(MAGIC)) != MAGIC:
+        raise NotARecording(fp.name)
+    while header := fp.read(FRAME.size):
+        if len(header) < FRAME.size:
+            return  # recording was cut off mid write
+        offset, length = FRAME.unpack(header)
+        line = fp.read(length)
+        if len(line) < length:
+            return
+        yield offset, line
+
+
+def replay(path: Path, realtime=False) -> Iterator[bytes]:
+    """Yield the recorded lines, at the pace they were recorded at if realtime."""
+    with open(path, "rb") as fp:
+        start = time.perf_counter()
+        for offset, line in read_frames(fp):
+            if realtime:
+                delay = start + offset - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            yield line
+
+
+class FakeModApi(object):
+    """Stands in for launchers_mod_api, remembering every command instead of acting on it."""
+
+    def __init__(self) -> None:
+        self.calls: list[tuple[str, str]] = []
+        self.player_specific_commands = {
+            name: self._recorder(name) for name in ["out", "setCursor", "copy", "acmd"]
+        }
+        self.global_commands = {}
+
+    def _recorder(self, name: str):
+        def handler(arg: str, since: float | None = None):
+            self.calls.append((name, arg))
+
+        return handler
+
+    def speak(self, text: str):
+        self.calls.append(("speak", text))
+
+    def play_sound(self, path: str):
+        self.calls.append(("sound", path))
+
+    def finish_dispatch(self):
+        pass
+
+
+def main():
+    from argparse import ArgumentParser
+    from launch_and_monitor import process_game_stdout
+
+    parser = ArgumentParser(prog="python -m stdout_recording")
+    parser.add_argument("recording", type=Path)
+    parser.add_argument(
+        "--realtime", action="store_true", help="replay at the recorded pace"
+    )
+    replay_args, _ = parser.parse_known_args()
+    api = FakeModApi()
+    start = time.perf_counter()
+    lines = 0
+
+    def counted():
+        nonlocal lines
+        for line in replay(replay_args.recording, replay_args.realtime):
+            lines += 1
+            yield line
+
+    process_game_stdout(counted(), False, None, None, api)
+    elapsed = time.perf_counter() - start
+    print(f"{lines} lines replayed in {elapsed:.3f}s", file=sys.stderr)
+    for name, count in Counter(name for name, _ in api.calls).most_common():
+        print(f"{name}: {count}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+# run with -m tests.bench_atomic_write
+# a menu session toggling settings one at a time, with and without coalescing saves
+from pathlib import Path
+import json
+import tempfile
+
+import atomic_write
+import config
+import config_autogenerated
+import fa_paths
+import player_data
+
+folder = Path(tempfile.mkdtemp())
+fa_paths.paths["CONFIG"] = folder / "config.ini"
+fa_paths.paths["PLAYER_DATA"] = folder / "player-data.json"
+lines = []
+settings = []
+for name, cls in vars(config_autogenerated).items():
+    if name.startswith("_") and isinstance(cls, type):
+        section = name[1:].replace("_", "-")
+        lines.append(f"[{section}]\n")
+        for setting in getattr(cls, "__annotations__", {}):
+            lines.append(f"{setting.replace('_', '-')}=false\n")
+        # one setting from each section
+        settings.append((section, setting.replace("_", "-")))
+fa_paths.CONFIG().write_text("".join(lines), encoding="utf8")
+player = {"console-history": ["/c game.print(1)"] * 200, "service-username": "x"}
+fa_paths.PLAYER_DATA().write_text(json.dumps(player), encoding="utf8")
+
+
+def session():
+    for section, setting in settings:
+        with config.current_conf:
+            config.current_conf.toggle(section, setting)
+    for _ in range(3):
+        data = player_data.get_player_data()
+        data["console-history"].append("/c game.print(2)")
+        player_data.save_player_data(data)
+
+
+for label, coalesce in [("saving each change", False), ("coalesced", True)]:
+    atomic_write.stats = atomic_write.WriteStats()
+    if coalesce:
+        with atomic_write.coalesce():
+            session()
+    else:
+        session()
+    print(f"{label}: {atomic_write.stats.summary()}")
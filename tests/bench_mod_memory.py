@@ -0,0 +1,89 @@
+# run with -m tests.bench_mod_memory
+# needs tests/mod_test_data.json, generate it with -m tests.mod_test_data
+from pathlib import Path
+from collections import defaultdict
+import gc
+import json
+import time
+import tracemalloc
+
+import mods
+
+data_path = Path(__file__).with_name("mod_test_data.json")
+if not data_path.exists():
+    raise SystemExit("No test data, run python -m tests.mod_test_data to create it")
+with data_path.open(encoding="utf8") as fp:
+    data = json.load(fp)
+
+mods.factorio_version = "2.0"
+
+
+# the representation from before versions were packed and releases slotted,
+# kept here as the baseline to compare against
+class OldModVersion(tuple):
+    def __new__(cls, version: str):
+        ver = [0, 0, 0]
+        for i, val in enumerate(version.split(".", 2)):
+            ver[i] = int(val)
+        return super().__new__(cls, ver)
+
+
+class OldPortalMod(object):
+    def __init__(self, release, name) -> None:
+        info = {
+            "factorio_version": release["info_json"]["factorio_version"],
+            "name": name,
+            "version": release["version"],
+        }
+        if "dependencies" in release["info_json"]:
+            info["dependencies"] = release["info_json"]["dependencies"]
+        self.info = info
+        if "dependencies" in info:
+            self.dependencies = mods.Dependencies(info["dependencies"])
+        else:
+            self.dependencies = None
+        self.version = OldModVersion(info["version"])
+        self.name = info["name"]
+        self.release = release
+
+
+def load_old():
+    by_name_version = defaultdict(mods.ModVersions)
+    for result in data["results"]:
+        for release in result.get("releases", []):
+            if release["info_json"].get("factorio_version") == mods.factorio_version:
+                m = OldPortalMod(release, result["name"])
+                by_name_version[m.name][m.version] = m
+    return by_name_version
+
+
+def load_new():
+    # skip the installed mod scan, only the portal info is being measured
+    manager = mods.ModManager.__new__(mods.ModManager)
+    manager.by_name_version = defaultdict(mods.ModVersions)
+    for result in data["results"]:
+        manager.add_info_for_mod(result)
+    return manager.by_name_version
+
+
+def measure(name, load):
+    # both start without any parsed dependencies cached
+    mods.Dependency._parse.cache_clear()
+    mods._shared_dependencies.cache_clear()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    by_name_version = load()
+    elapsed = time.perf_counter() - start
+    size, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    releases = sum(len(v) for v in by_name_version.values())
+    print(f"{name}: {len(by_name_version)} mods, {releases} releases in {elapsed:.2f}s")
+    print(f"  {size / 2**20:.1f}MiB held, {peak / 2**20:.1f}MiB peak")
+    print(f"  {size / releases:.0f} bytes per release")
+    return size
+
+
+before = measure("before", load_old)
+after = measure("after", load_new)
+print(f"{1 - after / before:.0%} less memory held")
@@ -0,0 +1,64 @@
+# run with -m tests.bench_resolver
+# needs tests/mod_test_data.json, generate it with -m tests.mod_test_data
+from pathlib import Path
+from collections import defaultdict
+import json
+import time
+
+import mods
+
+data_path = Path(__file__).with_name("mod_test_data.json")
+if not data_path.exists():
+    raise SystemExit("No test data, run python -m tests.mod_test_data to create it")
+with data_path.open(encoding="utf8") as fp:
+    data = json.load(fp)
+
+mods.factorio_version = "2.0"
+by_name_version: defaultdict[str, mods.ModVersions] = defaultdict(mods.ModVersions)
+deps: list[mods.Dependency] = []
+for result in data["results"]:
+    for release in result["releases"]:
+        if release["info_json"].get("factorio_version") != mods.factorio_version:
+            continue
+        m = mods.PortalMod(release, result["name"])
+        by_name_version[m.name][m.version] = m
+        if m.dependencies:
+            conflict = mods.DependencyType.CONFLICT
+            deps += [d for d in m.dependencies.values() if d.type != conflict]
+print(f"{len(by_name_version)} mods, {len(deps)} dependencies to resolve")
+
+
+def find_sorted(dep: mods.Dependency):
+    """The lookup as it was before ModVersions, kept for comparison."""
+    if dep.name not in by_name_version:
+        return None
+    vers = by_name_version[dep.name]
+    for ver in sorted(vers, reverse=True):
+        if dep.meets(ver):
+            return vers[ver]
+    return None
+
+
+def find_indexed(dep: mods.Dependency):
+    if dep.name not in by_name_version:
+        return None
+    vers = by_name_version[dep.name]
+    for ver in vers.matching(dep):
+        return vers[ver]
+    return None
+
+
+results = {}
+for func in [find_sorted, find_indexed]:
+    start = time.perf_counter()
+    results[func] = [func(dep) for dep in deps]
+    print(f"{func.__name__:>12}: {time.perf_counter() - start:.3f}s")
+assert results[find_sorted] == results[find_indexed]
+
+types = list(mods.DependencyType)
+start = time.perf_counter()
+for a in types * 10000:
+    for b in types:
+        a < b
+elapsed = time.perf_counter() - start
+print(f"{'type compare':>12}: {elapsed:.3f}s for {len(types) ** 2 * 10000}")
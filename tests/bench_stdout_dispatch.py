@@ -0,0 +1,108 @@
+# run with -m tests.bench_stdout_dispatch [--debug] [--latency] [capture]
+# capture is raw factorio stdout, e.g. from `factorio > capture.txt`, or a --fa-record recording
+# without one a capture heavy in acmd and setCursor traffic is generated
+# --debug includes the --fa-debug echo, send stdout somewhere other than a console
+# --latency adds the --fa-latency timing and prints its summary
+from argparse import ArgumentParser
+from collections import Counter
+import io
+import json
+import sys
+import time
+import types
+
+import fa_arg_parse
+from command_queue import CommandWorker
+from stdout_recording import MAGIC, replay
+import latency
+
+LINES = 200000
+
+counts: Counter[str] = Counter()
+
+
+def counter(name: str):
+    def handler(arg: str):
+        counts[name] += 1
+
+    return handler
+
+
+# the real queues with handlers that only count instead of speaking or playing sounds,
+# so only the cost of getting from a stdout line to its handler is measured
+# set up like launchers_mod_api's
+workers = {
+    "out": CommandWorker("out", counter("out"), latest_wins=True),
+    "setCursor": CommandWorker(
+        "setCursor", counter("setCursor"), latest_wins=True, interval=1 / 60
+    ),
+    "copy": CommandWorker("copy", counter("copy")),
+    # the generated acmds are all patches, which launchers_mod_api.acmd_merge_key merges
+    "acmd": CommandWorker("acmd", counter("acmd"), merge_key=lambda command: command),
+}
+
+
+def finish_dispatch():
+    for worker in workers.values():
+        worker.wait()
+        print(worker.summary(), file=sys.stderr)
+    if latency.enabled:
+        print(latency.stats.summary(), file=sys.stderr)
+
+
+sys.modules["launchers_mod_api"] = types.SimpleNamespace(
+    player_specific_commands={name: w.submit for name, w in workers.items()},
+    global_commands={},
+    speak=workers["out"].submit,
+    play_sound=counter("sound"),
+    finish_dispatch=finish_dispatch,
+)
+
+from launch_and_monitor import process_game_stdout
+
+
+def generate() -> bytes:
+    acmd = [
+        json.dumps({"command": "patch", "id": f"source{n}", "volume": 0.5, "pan": 0.1})
+        for n in range(8)
+    ]
+    lines = []
+    for i in range(LINES):
+        if i % 10 == 0:
+            lines.append(f"out 1 Iron ore, {i} at 3, 4")
+        elif i % 3 == 0:
+            lines.append(f"setCursor 1 {i % 1920},{i % 1080}")
+        elif i % 1000 == 1:
+            lines.append(f"{i / 60:10.3f} Info AppManager.cpp:123: Autosave done")
+        else:
+            lines.append(f"acmd 1 {acmd[i % len(acmd)]}")
+    return "\n".join(lines).encode() + b"\n"
+
+
+parser = ArgumentParser()
+parser.add_argument("capture", nargs="?")
+parser.add_argument("--debug", action="store_true")
+parser.add_argument("--latency", action="store_true")
+bench_args = parser.parse_args()
+if bench_args.capture:
+    with open(bench_args.capture, "rb") as fp:
+        data = fp.read()
+    if data.startswith(MAGIC):
+        data = b"".join(replay(bench_args.capture))
+else:
+    data = generate()
+line_count = data.count(b"\n")
+fa_arg_parse.args.fa_debug = bench_args.debug
+latency.enabled = bench_args.latency
+for worker in workers.values():
+    worker.timings = latency.stats if latency.enabled else None
+
+start = time.perf_counter()
+process_game_stdout(io.BytesIO(data), False, None, None)
+elapsed = time.perf_counter() - start
+
+print(
+    f"{line_count} lines in {elapsed:.3f}s, {elapsed / line_count * 1e6:.2f}us per line",
+    file=sys.stderr,
+)
+print(dict(counts), file=sys.stderr)
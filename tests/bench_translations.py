@@ -0,0 +1,34 @@
+# run with -m tests.bench_translations [path to core.cfg]
+# without a path the installed factorio's core.cfg is used
+from collections import defaultdict
+from pathlib import Path
+import sys
+import time
+
+import translations
+
+if len(sys.argv) > 1:
+    cfg = Path(sys.argv[1])
+else:
+    from fa_paths import READ_DIR
+
+    cfg = READ_DIR() / "core" / "locale" / "en" / "core.cfg"
+with cfg.open(encoding="utf8") as fp:
+    table = translations.read_cfg(fp, ret=defaultdict(dict))
+templates = [t for cat in table.values() for t in cat.values()]
+args = ["3", "21", "1", "several", "5"]
+print(f"{len(templates)} templates from {cfg}")
+
+
+def run(rounds: int):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for template in templates:
+            translations.expand(template, args)
+    return (time.perf_counter() - start) / rounds / len(templates)
+
+
+translations.compile_template.cache_clear()
+cold = run(1)
+warm = run(20)
+print(f"first expand {cold * 1e6:.2f}us, after that {warm * 1e6:.2f}us per template")
@@ -0,0 +1,62 @@
+"""Helpers for building a throwaway factorio write directory with mods in it."""
+
+import json
+import tempfile
+import zipfile
+from pathlib import Path
+
+import fa_paths
+
+FACTORIO_VERSION = "2.0.72"
+
+
+class FakeInstall(object):
+    def __init__(self) -> None:
+        self._tmp = tempfile.TemporaryDirectory()
+        root = Path(self._tmp.name)
+        self.read = root / "data"
+        self.write = root / "write"
+        self.mods = self.write / "mods"
+        self.config = self.write / "config" / "config.ini"
+        for p in (self.read, self.mods, self.config.parent):
+            p.mkdir(parents=True)
+        self.config.write_text(
+            "; version=13\n[other]\nenable-new-mods=true\n[controls]\n",
+            encoding="utf8",
+        )
+        self._old_paths = fa_paths.paths.copy()
+        self._old_version = getattr(fa_paths, "factorio_ver", None)
+        fa_paths.paths.update(
+            CONFIG=self.config, READ_DIR=self.read, WRITE_DIR=self.write, MODS=self.mods
+        )
+        fa_paths.factorio_ver = FACTORIO_VERSION
+
+    @staticmethod
+    def info(name: str, version: str, deps: list[str] | None = None):
+        info = {"name": name, "version": version, "factorio_version": "2.0"}
+        if deps is not None:
+            info["dependencies"] = deps
+        return info
+
+    def add_zip(self, name: str, version: str, deps: list[str] | None = None):
+        path = self.mods / f"{name}_{version}.zip"
+        with zipfile.ZipFile(path, "w") as zp:
+            folder = f"{name}_{version}/"
+            zp.writestr(folder, "")
+            zp.writestr(
+                folder + "info.json", json.dumps(self.info(name, version, deps))
+            )
+            zp.writestr(folder + "locale/en/strings.cfg", "[cat]\nkey=value\n")
+        return path
+
+    def add_folder(self, name: str, version: str, deps: list[str] | None = None):
+        path = self.mods / name
+        path.mkdir()
+        (path / "info.json").write_text(json.dumps(self.info(name, version, deps)))
+        return path
+
+    def close(self) -> None:
+        fa_paths.paths.clear()
+        fa_paths.paths.update(self._old_paths)
+        fa_paths.factorio_ver = self._old_version
+        self._tmp.cleanup()
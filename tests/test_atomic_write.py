@@ -0,0 +1,35 @@
+import unittest
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import atomic_write
+
+
+class AtomicWriteTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "config.ini"
+        self.path.write_bytes(b"old\n")
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_failed_write_keeps_old_file(self):
+        with mock.patch.object(atomic_write.os, "fsync", side_effect=OSError("full")):
+            with self.assertRaises(OSError):
+                atomic_write.replace_file(self.path, "new\n")
+        self.assertEqual(self.path.read_bytes(), b"old\n")
+        self.assertEqual(list(Path(self.dir.name).iterdir()), [self.path])
+
+    def test_coalesced_saves(self):
+        written = atomic_write.stats.files_written
+        with atomic_write.coalesce():
+            for i in range(5):
+                with atomic_write.coalesce():
+                    atomic_write.save(self.path, f"line {i}\r\n", newline="")
+                with atomic_write.open_saved(self.path, newline="") as fp:
+                    self.assertEqual(fp.read(), f"line {i}\r\n")
+            self.assertEqual(self.path.read_bytes(), b"old\n")
+        self.assertEqual(self.path.read_bytes(), b"line 4\r\n")
+        self.assertEqual(atomic_write.stats.files_written, written + 1)
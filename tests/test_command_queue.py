@@ -0,0 +1,89 @@
+import unittest
+import threading
+import time
+import io
+from contextlib import redirect_stderr
+
+from command_queue import CommandWorker
+
+
+class CommandWorkerTest(unittest.TestCase):
+    def setUp(self):
+        self.handled = []
+        self.release = threading.Event()
+
+    def blocking_handler(self, arg):
+        # the first command holds the worker so the rest pile up behind it
+        self.release.wait(5)
+        self.handled.append(arg)
+
+    def test_fifo_keeps_everything_in_order(self):
+        worker = CommandWorker("fifo", self.blocking_handler)
+        for i in range(5):
+            worker.submit(i)
+        self.release.set()
+        self.assertTrue(worker.wait(5))
+        self.assertEqual(self.handled, list(range(5)))
+        self.assertEqual(worker.dropped, 0)
+        self.assertEqual(worker.handled, 5)
+
+    def test_latest_wins_drops_waiting_commands(self):
+        worker = CommandWorker("latest", self.blocking_handler, latest_wins=True)
+        worker.submit("first")
+        # make sure the worker is holding the first one before queueing more
+        while not worker.busy:
+            time.sleep(0.001)
+        for arg in ["a", "b", "c"]:
+            worker.submit(arg)
+        self.release.set()
+        self.assertTrue(worker.wait(5))
+        self.assertEqual(self.handled, ["first", "c"])
+        self.assertEqual(worker.dropped, 2)
+        self.assertEqual(worker.max_depth, 1)
+
+    def test_handler_errors_dont_stop_the_worker(self):
+        def handler(arg):
+            if arg == "bad":
+                raise ValueError(arg)
+            self.handled.append(arg)
+
+        worker = CommandWorker("errors", handler)
+        with redirect_stderr(io.StringIO()) as err:
+            worker.submit("bad")
+            worker.submit("good")
+            self.assertTrue(worker.wait(5))
+        self.assertIn("ValueError", err.getvalue())
+        self.assertEqual(self.handled, ["good"])
+
+    def test_repeats_of_the_last_waiting_command_merge(self):
+        worker = CommandWorker(
+            "merge", self.blocking_handler, merge_key=lambda command: command
+        )
+        worker.submit("hold")
+        while not worker.busy:
+            time.sleep(0.001)
+        for arg in ["a", "b", "a", "a", "b", "c"]:
+            worker.submit(arg)
+        self.release.set()
+        self.assertTrue(worker.wait(5))
+        self.assertEqual(self.handled, ["hold", "a", "b", "a", "b", "c"])
+        self.assertEqual(worker.merged, 1)
+        # once handled the same command queues again
+        worker.submit("a")
+        self.assertTrue(worker.wait(5))
+        self.assertEqual(self.handled[-1], "a")
+
+    def test_interval_spaces_out_handler_calls(self):
+        calls = []
+        worker = CommandWorker(
+            "interval", lambda arg: calls.append(time.perf_counter()), interval=0.05
+        )
+        for i in range(3):
+            worker.submit(i)
+        self.assertTrue(worker.wait(5))
+        time.sleep(0.06)
+        worker.submit(3)
+        self.assertTrue(worker.wait(5))
+        self.assertEqual(len(calls), 4)
+        for a, b in zip(calls, calls[1:]):
+            self.assertGreaterEqual(b - a, 0.045)
@@ -0,0 +1,85 @@
+import unittest
+from unittest import mock
+
+import config
+from config import Conf_Editor, Config_Missing
+from tests.mod_fixtures import FakeInstall
+
+TEXT = (
+    "; version=13\r\n"
+    "[other]\r\n"
+    "; enable-new-mods=true\r\n"
+    "  check-updates = false \r\n"
+    "\r\n"
+    "[sound]\n"
+    "music-volume=0.5\n"
+    "; comment without a setting\n"
+    "dup=1\n"
+    "dup=2"
+)
+
+
+class ConfEditorTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.install = FakeInstall()
+        self.install.config.write_bytes(TEXT.encode())
+        self.conf = Conf_Editor()
+
+    def tearDown(self) -> None:
+        self.install.close()
+
+    def test_round_trip(self):
+        with self.conf:
+            self.conf.set_setting("sound", "music-volume", "0.5")
+            self.assertFalse(self.conf.unsaved)
+        self.assertEqual(self.install.config.read_bytes(), TEXT.encode())
+
+    def test_get(self):
+        with self.conf:
+            self.assertEqual(self.conf.get_setting("other", "check-updates"), "false")
+            self.assertEqual(self.conf.get_setting("other", "enable-new-mods"), "true")
+            self.assertEqual(self.conf.get_setting("", "version"), "13")
+            with self.assertRaises(Config_Missing):
+                self.conf.get_setting("sound", "comment without a setting")
+            with self.assertRaises(Config_Missing):
+                self.conf.get_setting("missing", "x")
+
+    def test_set(self):
+        with self.conf:
+            self.conf.set_setting("other", "check-updates", "true")
+            self.conf.set_setting("other", "enable-new-mods", "false")
+            self.conf.set_setting("sound", "new", "1", force=True)
+            self.conf.set_setting("new-section", "a", "b", force=True)
+            with self.assertRaises(Config_Missing):
+                self.conf.set_setting("sound", "other", "1")
+            with self.assertRaises(ValueError):
+                self.conf.set_setting("sound", "dup", "3")
+        expected = (
+            TEXT.replace("  check-updates = false ", "check-updates=true")
+            .replace("; enable-new-mods=true", "enable-new-mods=false")
+            .replace("dup=2", "dup=2\nnew=1\n[new-section]\na=b\n")
+        )
+        self.assertEqual(self.install.config.read_bytes(), expected.encode())
+        with self.conf:
+            self.assertEqual(self.conf.get_setting("new-section", "a"), "b")
+
+    def test_unchanged_file_not_reparsed(self):
+        with self.conf:
+            pass
+        generation = self.conf.generation
+        with mock.patch.object(config, "Section", wraps=config.Section) as section:
+            with self.conf:
+                pass
+        section.assert_not_called()
+        self.assertEqual(self.conf.generation, generation)
+
+    def test_reread_only_when_changed(self):
+        with self.conf:
+            self.conf.set_setting("sound", "music-volume", "1")
+        with mock.patch.object(config.atomic_write, "open_saved") as open_saved:
+            with self.conf:
+                self.assertEqual(self.conf.get_setting("sound", "music-volume"), "1")
+        open_saved.assert_not_called()
+        self.install.config.write_text("[sound]\nmusic-volume=0.25\n")
+        with self.conf:
+            self.assertEqual(self.conf.get_setting("sound", "music-volume"), "0.25")
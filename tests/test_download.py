@@ -0,0 +1,105 @@
+import unittest
+import hashlib
+import time
+import tempfile
+import threading
+from pathlib import Path
+from unittest import mock
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import factorio_web
+import download_manager
+
+DATA = bytes(range(256)) * 4096  # 1MiB
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # number of responses to cut off half way through
+    drops = 0
+    ranges: list[str | None] = []
+
+    def do_GET(self):
+        start = 0
+        range_header = self.headers.get("Range")
+        self.ranges.append(range_header)
+        if range_header:
+            start = int(range_header.removeprefix("bytes=").rstrip("-"))
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        body = DATA[start:]
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if _Handler.drops:
+            _Handler.drops -= 1
+            self.wfile.write(body[: len(body) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DownloadTest(unittest.TestCase):
+    def setUp(self) -> None:
+        _Handler.ranges = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.url = f"http://127.0.0.1:{self.server.server_port}/file"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.target = Path(self.tmp.name) / "file.zip"
+        self.sha1 = hashlib.sha1(DATA).hexdigest()
+
+    def tearDown(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def download(self, sha1):
+        factorio_web.download(self.url, self.target, sha1=sha1, progress=lambda *a: 0)
+
+    def test_resumes_after_drop(self):
+        _Handler.drops = 1
+        self.download(self.sha1)
+        self.assertEqual(self.target.read_bytes(), DATA)
+        self.assertEqual(_Handler.ranges[0], None)
+        self.assertEqual(_Handler.ranges[1], f"bytes={len(DATA) // 2}-")
+        self.assertFalse(self.target.with_name("file.zip.part").exists())
+
+    def test_gives_up_without_waiting_after_last_attempt(self):
+        _Handler.drops = factorio_web.DOWNLOAD_ATTEMPTS
+        with mock.patch.object(factorio_web.time, "sleep") as sleep:
+            with self.assertRaises(factorio_web.DownloadFailed):
+                self.download(self.sha1)
+        self.assertEqual(sleep.call_count, factorio_web.DOWNLOAD_ATTEMPTS - 1)
+
+    def test_checksum_mismatch_leaves_nothing(self):
+        with self.assertRaises(factorio_web.ChecksumMismatch):
+            self.download("0" * 40)
+        self.assertFalse(self.target.exists())
+        self.assertFalse(self.target.with_name("file.zip.part").exists())
+
+    def test_manager_downloads_all(self):
+        targets = [Path(self.tmp.name) / f"{i}.zip" for i in range(3)]
+        with download_manager.DownloadManager(max_concurrent=2) as manager:
+            for target in targets:
+                manager.add(self.url, target, sha1=self.sha1)
+        for target in targets:
+            self.assertEqual(target.read_bytes(), DATA)
+
+    def test_manager_raises_after_others_finish(self):
+        good = Path(self.tmp.name) / "good.zip"
+        with self.assertRaises(factorio_web.ChecksumMismatch):
+            with download_manager.DownloadManager() as manager:
+                manager.add(self.url, self.target, sha1="0" * 40)
+                manager.add(self.url, good, sha1=self.sha1)
+        self.assertEqual(good.read_bytes(), DATA)
+
+    def test_bandwidth_limit(self):
+        limiter = download_manager.BandwidthLimiter(len(DATA) * 4)
+        start = time.monotonic()
+        for i in range(8):
+            limiter(len(DATA))
+        self.assertGreater(time.monotonic() - start, 0.9)
@@ -0,0 +1,48 @@
+import unittest
+import tempfile
+from pathlib import Path
+
+import error_capture
+from error_capture import ErrorCapture
+
+
+class ErrorCaptureTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.log = Path(self.dir.name) / error_capture.LOG_NAME
+        self.errors = ErrorCapture(self.log)
+
+    def tearDown(self):
+        self.errors.close()
+        self.dir.cleanup()
+
+    def capture(self, lines: list[str]):
+        self.errors.start(lines[0])
+        for line in lines[1:]:
+            self.errors.add(line)
+        return self.errors.finish()
+
+    def test_long_blocks_keep_start_and_end(self):
+        lines = ["----- Error -----"] + [f"line {i}" for i in range(1000)]
+        text = self.capture(lines)
+        assert text
+        kept = text.splitlines()
+        head, tail = error_capture.HEAD_LINES, error_capture.TAIL_LINES
+        self.assertEqual(len(kept), head + tail + 1)
+        self.assertEqual(kept[:head], lines[:head])
+        self.assertEqual(kept[-tail:], lines[-tail:])
+        self.assertIn(f"{len(lines) - head - tail} lines skipped", kept[head])
+        self.assertIn("line 500", self.log.read_text())
+
+    def test_repeats_are_counted(self):
+        first = self.capture(["   1.000 Error Lua: boom", "  stack traceback"])
+        self.assertIsNotNone(first)
+        for t in range(2, 5):
+            self.assertIsNone(
+                self.capture([f"   {t}.000 Error Lua: boom", "  stack traceback"])
+            )
+        self.assertIsNotNone(self.capture(["   9.000 Error Lua: other"]))
+        summary = self.errors.summary()
+        assert summary
+        self.assertTrue(summary.startswith("5 errors reported, 2 different."))
+        self.assertIn("4 times: 1.000 Error Lua: boom", summary)
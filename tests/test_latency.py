@@ -0,0 +1,25 @@
+import unittest
+
+from latency import Histogram, LatencyStats
+
+
+class LatencyTest(unittest.TestCase):
+    def test_histogram_percentiles(self):
+        h = Histogram()
+        for ms in range(1, 101):
+            h.add(ms / 1000)
+        self.assertEqual(h.count, 100)
+        self.assertAlmostEqual(h.total / h.count, 0.0505)
+        # percentiles are reported as the upper bound of their bucket
+        self.assertEqual(h.percentile(0.5), 0.05)
+        self.assertEqual(h.percentile(0.9), 0.1)
+        self.assertEqual(h.percentile(1), 0.1)
+
+    def test_summary_orders_stages(self):
+        stats = LatencyStats()
+        for stage in ["done", "decode", "start"]:
+            stats.record("out", stage, 0.001)
+        lines = stats.summary().splitlines()
+        self.assertEqual(
+            [line.split()[1] for line in lines[2:]], ["decode", "start", "done"]
+        )
@@ -0,0 +1,111 @@
+import unittest
+import json
+from pathlib import Path
+
+import mods
+from tests.mod_fixtures import FakeInstall
+
+
+class ModIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.install = FakeInstall()
+        self.install.add_zip("zipped", "1.2.3", ["base >= 2.0"])
+        self.install.add_folder("folder", "0.1.0")
+        (self.install.mods / "mod-settings.dat").write_bytes(b"\0")
+
+    def tearDown(self) -> None:
+        self.install.close()
+
+    def scan(self):
+        manager = mods.ModManager()
+        manager.exit()
+        return manager
+
+    def test_warm_scan_matches_cold(self):
+        cold = self.scan()
+        index = mods.ModIndex(self.install.mods / "mod-index.json")
+        names = {Path(p).name for p in index.entries}
+        self.assertLessEqual({"zipped_1.2.3.zip", "folder"}, names)
+        warm = self.scan()
+        self.assertEqual(cold.dict, warm.dict)
+        self.assertGreaterEqual(warm.index.hits, 3)
+        self.assertEqual(
+            {n: set(v) for n, v in cold.by_name_version.items()},
+            {n: set(v) for n, v in warm.by_name_version.items()},
+        )
+        mod = warm.get_current_mod("zipped")
+        self.assertEqual(str(mod.dependencies["base"]), "base >= 2.0.0")
+        self.assertTrue(mod.folder_path.joinpath("info.json").is_file())
+
+    def test_changed_mod_is_reread(self):
+        self.scan()
+        path = self.install.mods / "folder" / "info.json"
+        info = json.loads(path.read_text())
+        info["dependencies"] = ["base", "zipped"]
+        path.write_text(json.dumps(info) + "\n")
+        manager = self.scan()
+        self.assertIn("zipped", manager.get_current_mod("folder").dependencies)
+
+    def test_removed_mod_is_pruned(self):
+        self.scan()
+        (self.install.mods / "zipped_1.2.3.zip").unlink()
+        manager = self.scan()
+        self.assertNotIn("zipped", manager.dict)
+        index = mods.ModIndex(self.install.mods / "mod-index.json")
+        self.assertFalse(any("zipped" in p for p in index.entries))
+
+
+class ModSessionTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.install = FakeInstall()
+        self.install.add_folder("folder", "0.1.0")
+        mods.mods.invalidate()
+
+    def tearDown(self) -> None:
+        mods.mods.invalidate()
+        self.install.close()
+
+    def test_manager_is_reused(self):
+        with mods.mods as first:
+            first.disable("folder")
+        with mods.mods as second:
+            self.assertIs(first, second)
+            with mods.mods as nested:
+                self.assertIs(first, nested)
+        data = json.loads((self.install.mods / "mod-list.json").read_text())
+        self.assertEqual(data["mods"], [{"name": "folder", "enabled": False}])
+
+    def test_external_change_rescans(self):
+        with mods.mods as first:
+            pass
+        self.install.add_zip("zipped", "1.0.0")
+        with mods.mods as second:
+            self.assertIsNot(first, second)
+            self.assertIn("zipped", second.dict)
+
+
+class ParallelScanTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.install = FakeInstall()
+        for i in range(20):
+            self.install.add_zip(f"mod{i}", f"1.0.{i}", ["base", f"? mod{i + 1}"])
+            self.install.add_zip(f"mod{i}", "0.9.0")
+        self.install.add_folder("folder", "0.1.0")
+
+    def tearDown(self) -> None:
+        self.install.close()
+
+    def scan(self, workers):
+        (self.install.mods / "mod-index.json").unlink(missing_ok=True)
+        return mods.ModManager(scan_workers=workers)
+
+    def test_parallel_matches_serial(self):
+        serial = self.scan(1)
+        parallel = self.scan(8)
+        self.assertEqual(list(serial.dict.items()), list(parallel.dict.items()))
+        self.assertEqual(serial.by_name_version.keys(), parallel.by_name_version.keys())
+        for name, versions in serial.by_name_version.items():
+            other = parallel.by_name_version[name]
+            self.assertEqual(list(versions), list(other))
+            for ver, mod in versions.items():
+                self.assertEqual(mod.info, other[ver].info)
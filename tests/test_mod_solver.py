@@ -0,0 +1,112 @@
+import unittest
+from collections import defaultdict
+from unittest import mock
+
+import mods
+import mod_solver
+from mod_solver import ModSolver, SearchLimitReached, UnsolvableDependencies
+
+
+def make_versions(spec: dict[str, dict[str, list[str]]]):
+    by_name_version: defaultdict[str, mods.ModVersions] = defaultdict(mods.ModVersions)
+    for name, versions in spec.items():
+        for ver, deps in versions.items():
+            m = mods.Mod(
+                {
+                    "name": name,
+                    "version": ver,
+                    "factorio_version": "2.0",
+                    "dependencies": deps,
+                }
+            )
+            by_name_version[name][m.version] = m
+    return by_name_version
+
+
+def solve(spec, *deps: str, current={}):
+    current = {name: mods.ModVersion(v) for name, v in current.items()}
+    solver = ModSolver(make_versions(spec), current)
+    res = solver.solve([mods.Dependency.from_str(d) for d in deps])
+    return {name: str(dep) for name, dep in res.items()}
+
+
+class ModSolverTest(unittest.TestCase):
+    def test_picks_newest(self):
+        spec = {"a": {"1.0": ["b"], "2.0": ["b >= 2.0"]}, "b": {"1.0": [], "2.0": []}}
+        self.assertEqual(solve(spec, "a"), {"a": "a = 2.0.0", "b": "b = 2.0.0"})
+
+    def test_backtracks_to_older_version(self):
+        spec = {
+            "a": {"1.0": ["b < 2.0"], "2.0": ["b >= 2.0"]},
+            "b": {"1.0": [], "2.0": []},
+            "c": {"1.0": ["b < 2.0"]},
+        }
+        res = solve(spec, "a", "c")
+        self.assertEqual(res["a"], "a = 1.0.0")
+        self.assertEqual(res["b"], "b = 1.0.0")
+
+    def test_conflict_forces_alternative(self):
+        spec = {
+            "a": {"1.0": ["~ b"], "2.0": ["b", "! c"]},
+            "b": {"1.0": []},
+            "c": {"1.0": ["? a < 2.0"]},
+        }
+        res = solve(spec, "a", "c")
+        self.assertEqual(res["a"], "a = 1.0.0")
+        self.assertEqual(res["c"], "c = 1.0.0")
+
+    def test_optional_only_constrains(self):
+        spec = {"a": {"1.0": ["? b >= 2.0", "! c"]}, "b": {"1.0": []}}
+        res = solve(spec, "a")
+        self.assertEqual(set(res), {"a", "b", "c"})
+        self.assertEqual(res["b"], "? b >= 2.0.0")
+        self.assertEqual(res["c"], "! c")
+
+    def test_explains_minimal_conflict(self):
+        spec = {
+            "a": {"1.0": ["b = 1.0"]},
+            "b": {"1.0": [], "2.0": []},
+            "c": {"1.0": ["b = 2.0"]},
+            "d": {"1.0": []},
+        }
+        with self.assertRaises(UnsolvableDependencies) as cm:
+            solve(spec, "d", "a", "c")
+        self.assertEqual([d.name for d in cm.exception.conflict], ["a", "c"])
+        self.assertEqual(cm.exception.mod, "b")
+        self.assertEqual(
+            {r.source for r in cm.exception.reasons}, {"a 1.0.0", "c 1.0.0"}
+        )
+
+    def test_missing_mod(self):
+        with self.assertRaises(UnsolvableDependencies) as cm:
+            solve({"a": {"1.0": ["missing"]}}, "a")
+        self.assertEqual(cm.exception.mod, "missing")
+
+    def test_keeps_current_version(self):
+        spec = {"a": {"1.0": ["b >= 1.0"]}, "b": {"1.0": [], "1.1": [], "2.0": []}}
+        res = solve(spec, "a", current={"b": "1.1"})
+        self.assertEqual(res, {"a": "a = 1.0.0", "b": "b >= 1.0.0"})
+        res = solve(spec, "a", "b < 1.1", current={"b": "1.1"})
+        self.assertEqual(res["b"], "b = 1.0.0")
+
+    def test_search_limit(self):
+        spec = {"a": {"1.0": ["b"]}, "b": {"1.0": []}}
+        with mock.patch.object(mod_solver, "MAX_SEARCH_STEPS", 1):
+            with self.assertRaises(SearchLimitReached) as cm:
+                solve(spec, "a")
+        self.assertIn("Gave up", str(cm.exception))
+        self.assertIn("a", str(cm.exception))
+
+    def test_minimize_shares_search_limit(self):
+        spec = {
+            "a": {"1.0": ["b = 1.0"]},
+            "b": {"1.0": [], "2.0": []},
+            "c": {"1.0": ["b = 2.0"]},
+            "d": {"1.0": []},
+        }
+        # enough for any one search, but not for every attempt to drop a mod
+        with mock.patch.object(mod_solver, "MAX_SEARCH_STEPS", 3):
+            with self.assertRaises(UnsolvableDependencies) as cm:
+                solve(spec, "a", "c", "d")
+        self.assertNotIsInstance(cm.exception, SearchLimitReached)
+        self.assertEqual([d.name for d in cm.exception.conflict], ["a", "c", "d"])
@@ -12,6 +12,59 @@ class ModTestBasic(unittest.TestCase):
             with self.subTest("sub", given=given, expect=expect) as sub:
                 self.assertEqual(str(mods.ModVersion(given)), expect)
 
+    def test_mod_version_order(self):
+        order = ["0.0.1", "0.1", "0.1.65535", "1.0.0", "1.2.3", "65535.0.0"]
+        versions = [mods.ModVersion(v) for v in order]
+        self.assertEqual(sorted(reversed(versions)), versions)
+        self.assertEqual(versions[4].parts(), (1, 2, 3))
+        self.assertEqual(f"{versions[2]}", "0.1.65535")
+        with self.assertRaises(ValueError):
+            mods.ModVersion("1.65536")
+
+    def test_dependency_value_semantics(self):
+        a = mods.Dependency.from_str("base >= 2.0")
+        self.assertIs(a, mods.Dependency.from_str("base >= 2.0"))
+        b = mods.Dependency.from_str("base>=2.0.0")
+        self.assertIsNot(a, b)
+        self.assertEqual(a, b)
+        self.assertEqual(len({a, b, mods.Dependency.from_str("? base >= 2.0")}), 2)
+
+    def test_version_range_matches_meets(self):
+        versions = sorted(
+            mods.ModVersion(v) for v in ["0.1", "1.0", "1.0.1", "1.1", "2.0", "2.0.5"]
+        )
+        for dep_str in [
+            "a",
+            "? a",
+            "! a",
+            "a = 1.0",
+            "a > 1.0",
+            "a >= 1.0",
+            "a < 2.0",
+            "a <= 2.0",
+            "a > 3.0",
+            "a < 0.0.1",
+        ]:
+            dep = mods.Dependency.from_str(dep_str)
+            with self.subTest("dep", dep=dep_str):
+                expect = [v for v in versions if dep.meets(v)]
+                found = [versions[i] for i in dep.version_range(versions)]
+                self.assertEqual(found, expect)
+
+    def test_mod_versions_stay_sorted(self):
+        versions = mods.ModVersions()
+        for v in ["1.1", "0.2", "1.0.10", "1.0.2"]:
+            versions[mods.ModVersion(v)] = None
+        versions[mods.ModVersion("0.2")] = None
+        self.assertEqual(
+            [str(v) for v in versions.newest_first()],
+            ["1.1.0", "1.0.10", "1.0.2", "0.2.0"],
+        )
+        dep = mods.Dependency.from_str("a < 1.1")
+        self.assertEqual(
+            [str(v) for v in versions.matching(dep)], ["1.0.10", "1.0.2", "0.2.0"]
+        )
+
     def test_parse_all_deps(self):
         if not hasattr(self, "data") or self.data is None:
             self.skipTest(
@@ -0,0 +1,79 @@
+import unittest
+import tempfile
+from pathlib import Path
+
+from portal_index import PortalIndex
+
+
+def result(name, title, summary, version="1.0.0", released="2024-01-01", fv="2.0"):
+    return {
+        "name": name,
+        "title": title,
+        "summary": summary,
+        "owner": "someone",
+        "downloads_count": len(summary),
+        "latest_release": {
+            "version": version,
+            "released_at": released,
+            "info_json": {"factorio_version": fv},
+        },
+    }
+
+
+class PortalIndexTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.index = PortalIndex(Path(self.tmp.name) / "portal.sqlite")
+        self.index._store(
+            [
+                result("even-distribution", "Even Distribution", "Spread items"),
+                result("Krastorio2", "Krastorio 2", "Overhaul mod with more items"),
+                result("old-mod", "Old Stuff", "Distribution of items", fv="1.1"),
+            ]
+        )
+
+    def tearDown(self) -> None:
+        self.index.close()
+        self.tmp.cleanup()
+
+    def names(self, query, fv=None):
+        return [r.name for r in self.index.search(query, fv)]
+
+    def test_search_title_and_summary(self):
+        self.assertEqual(self.names("krastorio"), ["Krastorio2"])
+        self.assertEqual(
+            set(self.names("items")), {"even-distribution", "Krastorio2", "old-mod"}
+        )
+        self.assertEqual(set(self.names("distrib")), {"even-distribution", "old-mod"})
+
+    def test_factorio_version_filter(self):
+        self.assertEqual(self.names("distribution", "2.0"), ["even-distribution"])
+
+    def test_like_fallback(self):
+        self.index.fts = False
+        self.assertEqual(
+            set(self.names("distrib item")), {"even-distribution", "old-mod"}
+        )
+
+    def test_store_replaces(self):
+        self.index._store([result("Krastorio2", "Krastorio 3", "New", "2.0.0")])
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.names("krastorio"), ["Krastorio2"])
+        self.assertEqual(self.index.search("krastorio")[0].latest_version, "2.0.0")
+
+    def test_full_store_rebuilds_search(self):
+        self.index.db.execute("DELETE FROM mods")
+        self.index.db.execute("INSERT INTO mods_fts(mods_fts) VALUES ('delete-all')")
+        self.index._store([result("space-age", "Space Age", "Rockets")], full=True)
+        self.assertEqual(self.names("rockets"), ["space-age"])
+        self.assertEqual(self.names("krastorio"), [])
+
+    def test_old_search_table_is_replaced(self):
+        self.index.db.execute("DROP TABLE mods_fts")
+        self.index.db.execute(
+            "CREATE VIRTUAL TABLE mods_fts USING fts5(name, title, summary)"
+        )
+        self.index.db.commit()
+        self.index.close()
+        self.index = PortalIndex(Path(self.tmp.name) / "portal.sqlite")
+        self.assertEqual(self.names("krastorio"), ["Krastorio2"])
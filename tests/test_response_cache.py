@@ -0,0 +1,72 @@
+import unittest
+import json
+import tempfile
+import threading
+from pathlib import Path
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import factorio_web
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    hits: list[str] = []
+    etag = '"v1"'
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        if self.headers.get("If-None-Match") == self.etag:
+            self.send_response(304)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = json.dumps({"path": self.path, "etag": self.etag}).encode()
+        self.send_response(200)
+        self.send_header("ETag", self.etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        _Handler.hits = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base = f"http://127.0.0.1:{self.server.server_port}"
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache = factorio_web.ResponseCache(Path(self.tmp.name))
+        self.offline = factorio_web.args.fa_offline
+
+    def tearDown(self) -> None:
+        factorio_web.args.fa_offline = self.offline
+        self.server.shutdown()
+        self.server.server_close()
+        self.tmp.cleanup()
+
+    def get(self, ttl):
+        return factorio_web.get_json_cached(self.cache, self.base + "/api", ttl)
+
+    def test_fresh_entry_skips_network(self):
+        first = self.get(60)
+        self.assertEqual(first, self.get(60))
+        self.assertEqual(len(_Handler.hits), 1)
+
+    def test_stale_entry_is_revalidated(self):
+        first = self.get(0)
+        self.assertEqual(first, self.get(0))
+        self.assertEqual(len(_Handler.hits), 2)
+        _Handler.etag = '"v2"'
+        self.assertEqual(self.get(0)["etag"], '"v2"')
+        _Handler.etag = '"v1"'
+
+    def test_offline_serves_stale(self):
+        first = self.get(0)
+        factorio_web.args.fa_offline = True
+        self.assertEqual(first, self.get(0))
+        self.assertEqual(len(_Handler.hits), 1)
+        with self.assertRaises(factorio_web.NotCached):
+            factorio_web.get_json_cached(self.cache, self.base + "/other", 0)
@@ -0,0 +1,80 @@
+import unittest
+import gzip
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import session_log
+from session_log import SessionLog, log_files, search
+
+LINES = [f"   {i}.000 Info tick {i}\n".encode() for i in range(300)]
+LINES[120] = b"  120.000 Error Lua: attempt to index nil\n"
+LINES[250] = b"out 1 Iron plate crafted\n"
+
+
+class SessionLogTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.folder = Path(self.dir.name)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def write_session(self):
+        log = SessionLog(self.folder)
+        self.assertEqual(list(log.tee(iter(LINES))), LINES)
+        return log
+
+    @mock.patch.object(session_log, "CHUNK_BYTES", 1024)
+    def test_logs_are_plain_gzip(self):
+        log = self.write_session()
+        assert log.path
+        self.assertEqual(gzip.decompress(log.path.read_bytes()), b"".join(LINES))
+        index = log.path.with_suffix(".idx").read_text().splitlines()
+        self.assertGreater(len(index), 1)
+
+    @mock.patch.object(session_log, "CHUNK_BYTES", 1024)
+    def test_search(self):
+        self.write_session()
+        hits = search(self.folder, "IRON PLATE")
+        self.assertEqual(
+            [(h.line_number, h.line) for h in hits],
+            [(251, LINES[250].decode().strip())],
+        )
+        errors = search(self.folder, errors_only=True)
+        self.assertEqual([h.line_number for h in errors], [121])
+        self.assertEqual(len(search(self.folder, "tick", limit=10)), 10)
+
+    def test_errors_only_skips_chunks_without_errors(self):
+        with mock.patch.object(session_log, "CHUNK_BYTES", 1024):
+            self.write_session()
+        with mock.patch.object(
+            session_log.gzip, "decompress", wraps=gzip.decompress
+        ) as d:
+            search(self.folder, errors_only=True)
+        self.assertEqual(d.call_count, 1)
+
+    @mock.patch.object(session_log, "MAX_SESSIONS", 2)
+    def test_old_sessions_are_removed(self):
+        for i in range(3):
+            log = SessionLog(self.folder)
+            log.name = f"session-2024-01-0{i + 1}_00-00-00"
+            list(log.tee(iter(LINES[:5])))
+        # a long session split over many files still only counts once
+        log = SessionLog(self.folder)
+        log.name = "session-2024-01-04_00-00-00"
+        with mock.patch.object(session_log, "CHUNK_BYTES", 1), mock.patch.object(
+            session_log, "MAX_FILE_BYTES", 0
+        ):
+            list(log.tee(iter(LINES[:3])))
+        names = [p.name for p in log_files(self.folder)]
+        self.assertEqual(
+            names,
+            [
+                "session-2024-01-04_00-00-00_03.log.gz",
+                "session-2024-01-04_00-00-00_02.log.gz",
+                "session-2024-01-04_00-00-00_01.log.gz",
+                "session-2024-01-03_00-00-00_01.log.gz",
+            ],
+        )
+        self.assertEqual(len(list(self.folder.glob("*.idx"))), 4)
@@ -0,0 +1,83 @@
+import unittest
+import io
+import tempfile
+import time
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from launch_and_monitor import process_game_stdout, save_complete
+from stdout_recording import FRAME, MAGIC, FakeModApi, record, replay
+
+SESSION = [
+    b"   0.512 Info AppManager.cpp:301: Factorio initialised\n",
+    b"out 1 hello\n",
+    b"out 1 <<<END\n",
+    b"first line\n",
+    b"out 1 inside a here doc\n",
+    b"END\n",
+    b"  12.003 Info ServerMultiplayerManager.cpp:1 PlayerJoinGame (x) playerIndex(1)\n",
+    b"out 1 for someone else\n",
+    b"out 2 for me\n",
+    b"------------- Error -------------\n",
+    b"The mod FactorioAccess caused a non-recoverable error.\n",
+    b"out 2 not a command while an error is printing\n",
+    b"---------------------------------\n",
+    b'acmd 2 {"command": "stop"}\n',
+    b"  20.100 Info AppManager.cpp:1: Saving finished\n",
+]
+
+
+class StdoutRecordingTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.dir.name) / "session.rec"
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_round_trip(self):
+        passed = list(record(iter(SESSION), self.path))
+        self.assertEqual(passed, SESSION)
+        self.assertEqual(list(replay(self.path)), SESSION)
+
+    def test_realtime_replay_keeps_pace(self):
+        with open(self.path, "wb") as fp:
+            fp.write(MAGIC)
+            for offset, line in [(0.0, b"a\n"), (0.1, b"b\n")]:
+                fp.write(FRAME.pack(offset, len(line)) + line)
+        start = time.perf_counter()
+        self.assertEqual(list(replay(self.path, realtime=True)), [b"a\n", b"b\n"])
+        self.assertGreaterEqual(time.perf_counter() - start, 0.09)
+
+    def test_monitor_state_machines(self):
+        list(record(iter(SESSION), self.path))
+        api = FakeModApi()
+        with redirect_stdout(io.StringIO()) as out:
+            process_game_stdout(replay(self.path), False, None, None, api)
+        self.assertEqual(
+            api.calls,
+            [
+                ("out", "hello"),
+                ("out", "first line\nout 1 inside a here doc\n"),
+                ("out", "for me"),
+                ("speak", api.calls[3][1]),
+                ("speak", "Printed error to console."),
+                ("acmd", '{"command": "stop"}'),
+                ("sound", save_complete),
+                ("speak", "1 error reported."),
+            ],
+        )
+        self.assertTrue(api.calls[3][1].startswith("Error Reported."))
+        printed = out.getvalue()
+        self.assertIn("Player index now 2", printed)
+        self.assertIn("not a command while an error is printing", printed)
+
+    def test_repeated_error_is_still_announced(self):
+        error = SESSION[9:11] + SESSION[12:13]
+        api = FakeModApi()
+        with redirect_stdout(io.StringIO()) as out:
+            process_game_stdout(iter(error * 2), False, None, None, api)
+        spoken = [arg for call, arg in api.calls if call == "speak"]
+        self.assertEqual(len([s for s in spoken if s.startswith("Error Reported.")]), 2)
+        self.assertEqual(spoken.count("Printed error to console."), 1)
+        self.assertEqual(out.getvalue().count("------------- Error"), 1)
@@ -0,0 +1,131 @@
+import unittest
+import os
+from unittest import mock
+
+import config
+import fa_paths
+import mods
+import translations
+from translations import TranslationTable, expand, get_control, load_full, translate
+from tests.mod_fixtures import FakeInstall
+
+
+class ExpandTest(unittest.TestCase):
+    def test_args_and_stray_underscores(self):
+        self.assertEqual(expand("__1__ and __2__", ["a", "b"]), "a and b")
+        self.assertEqual(expand("a__b__c"), "a__b__c")
+        self.assertEqual(expand("missing __3__", ["a"]), "missing __3__")
+
+    def test_plurals(self):
+        template = "__plural_for_parameter__1__{1=one item|ends in 1=__1__ items!|rest=__1__ items}__ left"
+        self.assertEqual(expand(template, ["1"]), "one item left")
+        self.assertEqual(expand(template, ["21"]), "21 items! left")
+        self.assertEqual(expand(template, ["5"]), "5 items left")
+        self.assertEqual(
+            expand("__plural_for_parameter_1_{1,2=few|rest=many}__", ["2"]), "few"
+        )
+
+    def test_replacement_in_plural(self):
+        template = (
+            "__plural_for_parameter__1__{1=__CONTROL_STYLE_BEGIN__one|rest=other}__!"
+        )
+        self.assertEqual(expand(template, ["1"]), "one!")
+        self.assertEqual(expand(template, ["4"]), "other!")
+
+
+class CompiledLocaleTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.install = FakeInstall()
+        fa_paths.paths["CACHE"] = self.install.write / "cache"
+        core = self.install.read / "core" / "locale" / "en" / "core.cfg"
+        core.parent.mkdir(parents=True)
+        core.write_text("[cat]\nkey=core\ncore-only=from core\n[other]\nx=y\n")
+        self.install.add_zip("zipped", "1.0.0")
+        mods.mods.invalidate()
+        patch = mock.patch.object(translations, "translation_table", TranslationTable())
+        self.table = patch.start()
+        self.addCleanup(patch.stop)
+
+    def tearDown(self) -> None:
+        mods.mods.invalidate()
+        self.install.close()
+
+    def test_categories_load_when_used(self):
+        load_full("en")
+        self.assertNotIn("cat", self.table)
+        self.assertEqual(translate(["cat.key"]), "value")
+        self.assertEqual(translate(["cat.core-only"]), "from core")
+        self.assertIn("cat", self.table)
+        self.assertNotIn("other", self.table)
+
+    def test_switching_back_restores_locale(self):
+        cfg = self.install.read / "core" / "locale" / "de" / "core.cfg"
+        cfg.parent.mkdir(parents=True)
+        cfg.write_text("[cat]\nkey=Wert\n")
+        load_full("en")
+        self.assertEqual(translate(["cat.key"]), "value")
+        load_full("de")
+        self.assertEqual(translate(["cat.key"]), "Wert")
+        self.assertEqual(translate(["cat.core-only"]), "from core")
+        load_full("en")
+        self.assertEqual(translate(["cat.key"]), "value")
+        self.assertEqual(translate(["other.x"]), "y")
+
+    def test_cache_is_reused_until_mods_change(self):
+        load_full("en")
+        cache = fa_paths.CACHE() / "locale-en.cache"
+        written = cache.stat().st_mtime_ns
+        with mock.patch.object(translations, "read_cfg") as read_cfg:
+            self.table.sources.clear()
+            load_full("en")
+        # only the launcher's own strings, not core or the mods
+        self.assertEqual(read_cfg.call_count, 1)
+        self.assertEqual(cache.stat().st_mtime_ns, written)
+
+        self.install.add_zip("zipped", "1.0.1")
+        mods.mods.invalidate()
+        self.table.sources.clear()
+        with mock.patch.object(
+            translations, "read_cfg", wraps=translations.read_cfg
+        ) as read_cfg:
+            load_full("en")
+        self.assertGreater(read_cfg.call_count, 1)
+
+
+class ControlCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.install = FakeInstall()
+        self.install.config.write_text("[controls]\nmove-up=W\nmine=SHIFT + M\n")
+        with config.current_conf:
+            pass
+        translations._read_control.cache_clear()
+        translations._cached_translate.cache_clear()
+
+    def tearDown(self) -> None:
+        self.install.close()
+
+    def test_config_not_reread(self):
+        with mock.patch.object(config.atomic_write, "open_saved") as open_saved:
+            for _ in range(5):
+                self.assertEqual(get_control("move-up"), ["W"])
+                self.assertEqual(get_control("mine"), ["SHIFT", "M"])
+        open_saved.assert_not_called()
+
+    def test_changed_setting_is_seen(self):
+        self.assertEqual(get_control("move-up"), ["W"])
+        with config.current_conf as conf:
+            conf.controls.move_up = "Q"
+        self.assertEqual(get_control("move-up"), ["Q"])
+
+    @mock.patch.object(translations, "translation_table", TranslationTable())
+    def test_outside_edit_is_seen(self):
+        translations.translation_table["t"] = {"k": "__ALT_CONTROL__1__move-up__"}
+        self.assertEqual(get_control("move-up"), ["W"])
+        self.assertEqual(translate(["t.k"]), "W")
+        self.install.config.write_text("[controls]\nmove-up=Q\nmine=SHIFT + M\n")
+        os.utime(self.install.config, ns=(1, 1))
+        # only looked for when a menu is shown, not on every translation
+        self.assertEqual(translate(["t.k"]), "W")
+        config.current_conf.reload_if_changed()
+        self.assertEqual(get_control("move-up"), ["Q"])
+        self.assertEqual(translate(["t.k"]), "Q")
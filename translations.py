@@ -6,9 +6,12 @@ import os
 import zipfile
 from pathlib import Path
 import json
+import hashlib
+from functools import lru_cache
 
 from fa_arg_parse import d_print
 import config
+import atomic_write
 
 # cSpell:words leftshoulder rightshoulder
 
@@ -24,8 +27,13 @@ def get_control(name: str) -> list[str]:
             name += con
         if has_alt:
             name += alt
+    return list(_read_control(name, config.current_conf.generation))
+
+
+@lru_cache(maxsize=1024)
+def _read_control(name: str, generation: int) -> tuple[str, ...]:
     with config.current_conf:
-        return config.current_conf.get_setting("controls", name).split(" + ")
+        return tuple(config.current_conf.get_setting("controls", name).split(" + "))
 
 
 def t_control(control_name, alt_type=0):
@@ -143,13 +151,39 @@ def do_special(special, n=0):
     return translate(special[input_type], n)
 
 
+n_word = re.compile(r"\bn\b")
+
+
 class MissingTranslation(LookupError):
     pass
 
 
+def _freeze(l_str):
+    if isinstance(l_str, (list, tuple)):
+        return tuple(_freeze(part) for part in l_str)
+    return l_str
+
+
 def translate(l_str: localised_str, n=0, error=False) -> str:
     if type(l_str) == str:
         return l_str
+    frozen = _freeze(l_str)
+    try:
+        hash(frozen)
+    except TypeError:
+        return _translate(l_str, n, error)
+    generation = config.current_conf.generation
+    return _cached_translate(frozen, n, error, input_type, generation)
+
+
+# results depend on the input method and settings through the control replacements
+# emptied when translations are loaded, as the table doesn't track its own changes
+@lru_cache(maxsize=4096)
+def _cached_translate(l_str, n, error, input_type, generation) -> str:
+    return _translate(l_str, n, error)
+
+
+def _translate(l_str: localised_str, n=0, error=False) -> str:
     try:
         key, *args = l_str
     except:
@@ -170,7 +204,7 @@ def translate(l_str: localised_str, n=0, error=False) -> str:
     except:
         cat = ""
     if n:
-        key = re.sub(r"\bn\b", str(n), key)
+        key = n_word.sub(str(n), key)
     if key not in translation_table[cat]:
         if error:
             raise MissingTranslation(cat, key)
@@ -178,7 +212,34 @@ def translate(l_str: localised_str, n=0, error=False) -> str:
     return expand(translation_table[cat][key], args)
 
 
-translation_table = defaultdict(dict)
+locale_source = Union["CompiledLocale", dict[str, dict[str, str]]]
+
+
+class TranslationTable(defaultdict[str, dict[str, str]]):
+    """Categories come from the compiled locale sources only when first looked up.
+    Later sources override earlier ones, so the chosen locale is added after English."""
+
+    def __init__(self) -> None:
+        super().__init__(dict)
+        self.sources: dict[str, "locale_source"] = {}
+
+    def __missing__(self, cat: str) -> dict[str, str]:
+        entries: dict[str, str] = {}
+        for source in self.sources.values():
+            entries.update(source.get(cat, {}))
+        self[cat] = entries
+        return entries
+
+    def add_source(self, code: str, source: "locale_source"):
+        # adding one again moves it back on top
+        self.sources.pop(code, None)
+        self.sources[code] = source
+        # categories already in use get the new entries layered on top
+        for cat, entries in self.items():
+            entries.update(source.get(cat, {}))
+
+
+translation_table = TranslationTable()
 
 
 class translated_args(dict):
@@ -204,65 +265,116 @@ def plural_compat_replacer(m: re.Match):
     return "__plural_for_parameter__" + m[1] + "__{"
 
 
-def expand(template: str, args: list[localised_str] = []) -> str:
-    template = plural_compat.sub(plural_compat_replacer, template)
-    parts = template.split("__")
-    ret, _ = expand_r(parts, translated_args(args))
-    return ret
+# a compiled template is a flat list of these instructions, run front to back
+_LITERAL, _ARG, _CALL, _PLURAL, _JUMP = range(5)
+instruction = tuple
+
 
+def _add_literal(program: list[instruction | None], text: str):
+    if not text:
+        return
+    if program and program[-1] and program[-1][0] == _LITERAL:
+        program[-1] = (_LITERAL, program[-1][1] + text)
+    else:
+        program.append((_LITERAL, text))
 
-def expand_r(
-    parts: list[str], t_args: translated_args, in_plural=False
-) -> tuple[str, str]:
-    ret = ""
+
+def _compile_parts(
+    parts: list[str], i: int, program: list[instruction | None], in_plural=False
+) -> tuple[int, str]:
+    """Compiles parts from i until the end, or the end of a plural branch.
+    Returns where it stopped and what's left of the part it stopped in."""
     stray__ = False
-    while parts:
-        p = parts.pop(0)
+    while i < len(parts):
+        p = parts[i]
+        i += 1
         if p in replacement_functions:
             num_args, rep_func = replacement_functions[p]
-            args, parts = parts[:num_args], parts[num_args:]
-            ret += rep_func(*args)
+            program.append((_CALL, rep_func, tuple(parts[i : i + num_args])))
+            i += num_args
         elif p == "plural_for_parameter":
-            arg_num = parts.pop(0)
-            my_num = t_args[arg_num]
-            remaining = parts.pop(0)
+            arg_num = parts[i]
+            remaining = parts[i + 1]
+            i += 2
             assert remaining[0] == "{", "Unexpected start of plural. Expected {"
             remaining = remaining[1:]
-            matched = False
+            plural_at = len(program)
+            program.append(None)
+            branches = []
+            jumps = []
             while remaining:
                 condition, remaining = remaining.split("=", 1)
-                assert type(remaining) == str
-                parts.insert(0, remaining)
-                temp_res, remaining = expand_r(parts, t_args, True)
-                if not matched:
-                    matched = True
-                    for cond in condition.split(","):
-                        if cond == "rest":
-                            break
-                        if my_num == cond:
-                            break
-                        if "ends in " in cond:
-                            check = cond[8:]
-                            if my_num.endswith(check):
-                                break
-                    else:
-                        matched = False
-                    if matched:
-                        ret += temp_res
+                parts.insert(i, remaining)
+                branches.append((tuple(condition.split(",")), len(program)))
+                i, remaining = _compile_parts(parts, i, program, True)
+                jumps.append(len(program))
+                program.append(None)
+            end = len(program)
+            for jump in jumps:
+                program[jump] = (_JUMP, end)
+            program[plural_at] = (_PLURAL, arg_num, tuple(branches), end)
         elif p.isdigit():
-            ret += t_args[p]
+            program.append((_ARG, p))
         else:
             if "|" in p or "}" in p and in_plural:
                 p, add_back = re.split(r"}|\|", p, 1)
-                ret += p
-                return ret, add_back
+                _add_literal(program, p)
+                return i, add_back
             if stray__:
-                ret += "__"
-            ret += p
+                _add_literal(program, "__")
+            _add_literal(program, p)
             stray__ = True
             continue
         stray__ = False
-    return ret, ""
+    return i, ""
+
+
+@lru_cache(maxsize=None)
+def compile_template(template: str) -> tuple[instruction, ...]:
+    template = plural_compat.sub(plural_compat_replacer, template)
+    program: list[instruction | None] = []
+    _compile_parts(template.split("__"), 0, program)
+    return tuple(program)
+
+
+def _plural_matches(conditions: tuple[str, ...], my_num: str):
+    for cond in conditions:
+        if cond == "rest":
+            return True
+        if my_num == cond:
+            return True
+        if "ends in " in cond:
+            check = cond[8:]
+            if my_num.endswith(check):
+                return True
+    return False
+
+
+def expand(template: str, args: list[localised_str] = []) -> str:
+    program = compile_template(template)
+    t_args = translated_args(args)
+    ret = []
+    i = 0
+    while i < len(program):
+        op = program[i]
+        i += 1
+        kind = op[0]
+        if kind == _LITERAL:
+            ret.append(op[1])
+        elif kind == _ARG:
+            ret.append(t_args[op[1]])
+        elif kind == _CALL:
+            ret.append(op[1](*op[2]))
+        elif kind == _PLURAL:
+            my_num = t_args[op[1]]
+            i = op[3]
+            for conditions, start in op[2]:
+                if _plural_matches(conditions, my_num):
+                    i = start
+                    break
+        else:
+            i = op[1]
+    return "".join(ret)
 
 
 fancy = re.compile(r"[*.?()\[\]]")
@@ -357,30 +469,107 @@ def check_config_locale():
             print("\t", t_cat, count)
 
 
-def maybe_load(path: Path | zipfile.Path):
+def maybe_load(path: Path | zipfile.Path, ret=translation_table):
     try:
         with path.open(encoding="utf8") as fp:
-            read_cfg(fp, ret=translation_table)
+            read_cfg(fp, ret=ret)
     except FileNotFoundError:
         pass
 
 
+# bump when the compiled locale format changes
+LOCALE_CACHE_VERSION = 1
+
+
+class CompiledLocale(object):
+    """One locale's core and mod translations cached in a file so they aren't parsed every start.
+    The first line is a json header with the cache key and each category's offset and length,
+    followed by each category's entries as a json object, read only when asked for."""
+
+    def __init__(self, path: Path, header_size: int, index: dict[str, list[int]]):
+        self.path = path
+        self.header_size = header_size
+        self.index = index
+
+    @classmethod
+    def open(cls, path: Path, key: str) -> "CompiledLocale | None":
+        try:
+            with open(path, "rb") as fp:
+                header_line = fp.readline()
+            header = json.loads(header_line)
+        except (OSError, ValueError):
+            return None
+        if header.get("key") != key:
+            return None
+        return cls(path, len(header_line), header["index"])
+
+    @classmethod
+    def write(cls, path: Path, key: str, table: dict[str, dict[str, str]]):
+        blobs = [json.dumps(entries).encode() for entries in table.values()]
+        index = {}
+        offset = 0
+        for cat, blob in zip(table, blobs):
+            index[cat] = [offset, len(blob)]
+            offset += len(blob)
+        header_line = json.dumps({"key": key, "index": index}).encode() + b"\n"
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write.replace_file(path, header_line + b"".join(blobs))
+        return cls(path, len(header_line), index)
+
+    def get(self, cat: str, default: dict[str, str]) -> dict[str, str]:
+        if cat not in self.index:
+            return default
+        offset, length = self.index[cat]
+        with open(self.path, "rb") as fp:
+            fp.seek(self.header_size + offset)
+            return json.loads(fp.read(length))
+
+
+def _locale_key(code: str, mod_manager) -> str:
+    from fa_paths import FACTORIO_VERSION
+
+    parts: list = [LOCALE_CACHE_VERSION, FACTORIO_VERSION(), code]
+    for mod in mod_manager.iter_installed_mods():
+        entry = [mod.name, str(mod.version), str(mod.path)]
+        locale = mod.path / "locale" / code
+        if isinstance(locale, Path) and locale.is_dir():
+            # mods in folders get edited in place without a new version
+            entry += [[p.name, p.stat().st_mtime_ns] for p in sorted(locale.iterdir())]
+        parts.append(entry)
+    return hashlib.sha1(json.dumps(parts).encode()).hexdigest()
+
+
 def load_init(code):
     cfg = Path(__file__).parent.joinpath("r", "locale", code + ".cfg")
-    maybe_load(cfg)
+    maybe_load(cfg, translation_table)
+    _cached_translate.cache_clear()
 
 
 def load_full(code):
     load_init(code)
-    from fa_paths import READ_DIR
-
-    cfg = READ_DIR() / "core" / "locale" / code / "core.cfg"
-    maybe_load(cfg)
+    if code in translation_table.sources:
+        translation_table.add_source(code, translation_table.sources[code])
+        _cached_translate.cache_clear()
+        return
+    from fa_paths import READ_DIR, CACHE
     from mods import mods
 
     with mods as mod_manager:
-        for cfg in mod_manager.iter_mod_files("locale/" + code + "/.*.cfg"):
-            maybe_load(cfg)
+        key = _locale_key(code, mod_manager)
+        path = CACHE() / f"locale-{code}.cache"
+        source = CompiledLocale.open(path, key)
+        if source is None:
+            parsed: dict[str, dict[str, str]] = defaultdict(dict)
+            maybe_load(READ_DIR() / "core" / "locale" / code / "core.cfg", parsed)
+            for cfg in mod_manager.iter_mod_files("locale/" + code + "/.*.cfg"):
+                maybe_load(cfg, parsed)
+            try:
+                source = CompiledLocale.write(path, key, parsed)
+            except OSError as e:
+                d_print(f"Unable to cache {code} translations: {e}")
+                source = parsed
+    translation_table.add_source(code, source)
+    _cached_translate.cache_clear()
 
 
 def get_langs():
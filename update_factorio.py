@@ -9,6 +9,7 @@ from sys import platform
 from credentials import get_credentials
 from factorio_web import get_json, download
 from fa_paths import BIN, TEMP, FACTORIO_VERSION
+from download_manager import DownloadManager
 
 debug = False
 
@@ -123,14 +124,15 @@ def prep_update(current_version, update_candidates):
     params.update(**get_credentials())
     params["package"] = current_version["package"]
     params["apiVersion"] = 2
-    for i, update in enumerate(update_candidates):
-        this_params = params | update
-        print("Downloading " + update["to"])
-        download(
-            "https://updater.factorio.com/updater/get-download",
-            update_filename(params, update),
-            this_params,
-        )
+    with DownloadManager() as manager:
+        for update in update_candidates:
+            this_params = params | update
+            print("Downloading " + update["to"])
+            manager.add(
+                "https://updater.factorio.com/updater/get-download",
+                update_filename(params, update),
+                this_params,
+            )
     print("Finished Downloads")
     return
 